@@ -0,0 +1 @@
+"""Benchmarks for the game and the bot - run with python -m benchmarks"""
@@ -0,0 +1,288 @@
+"""Time the game and the bot, and compare the timings between changes
+
+    python -m benchmarks run --output results.json
+    python -m benchmarks compare baseline.json results.json
+    python -m benchmarks startup --budget 50
+
+run writes every timing to a JSON file, and compare reports each one that
+has got worse than in the baseline by more than the threshold, exiting
+with status 1 if there are any. startup checks that importing the game in
+a fresh interpreter, as each worker process does, stays within a budget
+and does not load the GUI.
+"""
+
+import argparse
+import json
+import platform
+import random
+import subprocess
+import sys
+import timeit
+from time import perf_counter
+from typing import Optional
+
+from game.game_class import Bot, Game
+from game.helpers import check_for_win
+
+# The board sizes check_for_win and Game are timed on
+SIZES = range(3, 9)
+
+# Modules the headless core must not import
+GUI_MODULES = ("tkinter", "game.guis")
+
+# Run in a fresh interpreter to time importing the game, printing the
+# seconds taken and any GUI modules that were loaded
+IMPORT_SCRIPT = """
+import sys
+from time import perf_counter
+start = perf_counter()
+import game
+print(perf_counter() - start, *(m for m in {gui!r} if m in sys.modules))
+""".format(gui=GUI_MODULES)
+
+# Positions the bot is timed on: the rows of the board, and how far ahead
+# to search (None to the end of the game). Player 2 is to move in each.
+POSITIONS = {
+    "3x3_empty": ([[0, 0, 0], [0, 0, 0], [0, 0, 0]], None),
+    "3x3_corners": ([[1, 0, 0], [0, 2, 0], [0, 0, 1]], None),
+    "4x4_opening": (
+        [[1, 0, 0, 0], [0, 0, 0, 0], [0, 0, 0, 0], [0, 0, 0, 0]],
+        5,
+    ),
+    "5x5_opening": (
+        [
+            [0, 0, 0, 0, 0],
+            [0, 0, 0, 0, 0],
+            [0, 0, 1, 0, 0],
+            [0, 0, 0, 0, 0],
+            [0, 0, 0, 0, 0],
+        ],
+        3,
+    ),
+}
+
+
+def boards(size: int) -> dict[str, list[list[int]]]:
+    """an empty, a part-played and a finished board of a size"""
+    rng = random.Random(size)
+    squares = [(i, j) for i in range(size) for j in range(size)]
+    rng.shuffle(squares)
+
+    # Half the squares filled in turn, keeping clear of any wins by leaving
+    # out the last square of each line
+    mid = [[0] * size for _ in range(size)]
+    for turn, (i, j) in enumerate(squares[: size * size // 2]):
+        mid[i][j] = turn % 2 + 1
+        if check_for_win(mid):
+            mid[i][j] = 0
+
+    # The same board, with player 1 taking the whole of the last row
+    terminal = [list(row) for row in mid]
+    terminal[-1] = [1] * size
+    return {
+        "empty": [[0] * size for _ in range(size)],
+        "mid": mid,
+        "terminal": terminal,
+    }
+
+
+def per_call(statement, repeats: int) -> float:
+    """the fastest time one call of statement took, in seconds"""
+    timer = timeit.Timer(statement)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeats, number)) / number
+
+
+def search_bot(rows: list[list[int]], max_depth: Optional[int]):
+    """a game in a position, and a bot that always searches to move in it"""
+    game = Game(board=rows)
+    bot = Bot(
+        2, game.board, max_depth=max_depth, time_limit=None, perfect_play=False
+    )
+    return game, bot
+
+
+def self_play() -> int:
+    """play a 3x3 game between two searching bots
+
+    returns: the result, as check_for_win
+    """
+    game = Game(3)
+    bots = {
+        player: Bot(player, game.board, time_limit=None, perfect_play=False)
+        for player in (1, 2)
+    }
+    player = 1
+    while not game.check_for_win():
+        i, j = bots[player].choose_move(game)
+        game.place(player, i, j)
+        player = 3 - player
+    return game.check_for_win()
+
+
+def import_time(repeats: int = 5) -> tuple[float, list[str]]:
+    """time importing the game in a fresh interpreter
+
+    repeats: the number of interpreters to start, keeping the fastest
+    returns: the fastest time in seconds, and the GUI modules the import
+    loaded
+    """
+    fastest = float("inf")
+    for _ in range(repeats):
+        output = subprocess.run(
+            [sys.executable, "-c", IMPORT_SCRIPT],
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout.split()
+        fastest = min(fastest, float(output[0]))
+    return fastest, output[1:]
+
+
+def run(repeats: int = 5) -> dict[str, dict]:
+    """time everything
+
+    repeats: the number of times to repeat each timing, keeping the fastest
+    returns: each timing by name, with its value, unit and whether "lower"
+    or "higher" is better
+    """
+    results = {}
+
+    def record(name: str, value: float, unit: str, better: str = "lower"):
+        results[name] = {"value": value, "unit": unit, "better": better}
+        print(f"{name:40} {value:14.1f} {unit}", file=sys.stderr)
+
+    seconds, _ = import_time(repeats)
+    record("import/game", seconds * 1000, "ms")
+
+    for size in SIZES:
+        for kind, board in boards(size).items():
+            seconds = per_call(lambda: check_for_win(board), repeats)
+            record(f"check_for_win/{size}x{size}/{kind}", seconds * 1e9, "ns")
+
+    for size in SIZES:
+        seconds = per_call(lambda: Game(size), repeats)
+        record(f"game_init/{size}x{size}", seconds * 1e6, "us")
+
+    for name, (rows, max_depth) in POSITIONS.items():
+        # A new bot for each timing, so none starts with a warm table
+        fastest = float("inf")
+        for _ in range(repeats):
+            game, bot = search_bot(rows, max_depth)
+            start = perf_counter()
+            bot.choose_move(game)
+            fastest = min(fastest, perf_counter() - start)
+        record(f"choose_move/{name}", fastest * 1000, "ms")
+        record(
+            f"choose_move/{name}/nodes_per_second",
+            bot.nodes / fastest,
+            "nodes/s",
+            "higher",
+        )
+
+    games = 0
+    start = perf_counter()
+    while games < repeats or perf_counter() - start < 1.0:
+        self_play()
+        games += 1
+    record(
+        "self_play/3x3",
+        games / (perf_counter() - start),
+        "games/s",
+        "higher",
+    )
+    return results
+
+
+def compare(
+    baseline: dict[str, dict], results: dict[str, dict], threshold: float
+) -> list[str]:
+    """find the timings that have got worse
+
+    threshold: the fraction a timing may get worse by before it counts
+    returns: the names of the timings that got worse
+    """
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        old, new = baseline[name]["value"], result["value"]
+        # The fraction the timing got worse by, whichever way is better
+        if result["better"] == "higher":
+            change = (old - new) / old if old else 0.0
+        else:
+            change = (new - old) / old if old else 0.0
+        flag = "REGRESSION" if change > threshold else ""
+        print(
+            f"{name:40} {old:14.1f} {new:14.1f} {result['unit']:8}"
+            f" {-change:+8.1%} {flag}"
+        )
+        if flag:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    """run or compare the benchmarks from the command line"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="time everything")
+    run_parser.add_argument("--output", default="benchmarks/results.json")
+    run_parser.add_argument("--repeats", type=int, default=5)
+
+    compare_parser = commands.add_parser(
+        "compare", help="flag timings that got worse"
+    )
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("results")
+    compare_parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="the fraction a timing may get worse by (default 0.1)",
+    )
+
+    startup_parser = commands.add_parser(
+        "startup", help="check the time taken to import the game"
+    )
+    startup_parser.add_argument(
+        "--budget",
+        type=float,
+        default=50.0,
+        help="the most milliseconds the import may take (default 50)",
+    )
+    startup_parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    if args.command == "run":
+        report = {
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "results": run(args.repeats),
+        }
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+        return
+
+    if args.command == "startup":
+        seconds, loaded = import_time(args.repeats)
+        print(f"import game: {seconds * 1000:.1f} ms")
+        if loaded:
+            print(f"FAIL: the core imported {', '.join(loaded)}")
+        if seconds * 1000 > args.budget:
+            print(f"FAIL: over the budget of {args.budget:g} ms")
+        if loaded or seconds * 1000 > args.budget:
+            sys.exit(1)
+        return
+
+    with open(args.baseline) as file:
+        baseline = json.load(file)["results"]
+    with open(args.results) as file:
+        results = json.load(file)["results"]
+    if compare(baseline, results, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,16 @@
-from .game_class import Game
-from .guis import TicTacToeWindow, TicTacToeWindowIn2D
+from .game_class import Bot, Game
 
-__all__ = ["Game", "TicTacToeWindow", "TicTacToeWindowIn2D"]
+__all__ = ["Bot", "Game", "TicTacToeWindow", "TicTacToeWindowIn2D"]
+
+# The windows need tkinter, which is slow to import and missing from many
+# minimal installs, so they are only imported when first used
+_GUIS = ("BoardCanvas", "TicTacToeWindow", "TicTacToeWindowIn2D")
+
+
+def __getattr__(name: str):
+    """import the GUI classes on first use"""
+    if name in _GUIS:
+        from . import guis
+
+        return getattr(guis, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
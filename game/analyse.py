@@ -0,0 +1,259 @@
+"""Find the bot's move in many positions, read and written as JSON lines
+
+Each line read is one position, either the rows of the board or an object
+that may also give the player to move, the number in a row needed to win
+and an id to copy to the result:
+
+    [[1, 0, 0], [0, 2, 0], [0, 0, 0]]
+    {"id": "a", "board": [[1, 0, 0], [0, 0, 0], [0, 0, 0]], "player": 2}
+
+By default the player to move is the one with fewer counters, player 1 if
+both have as many. Each line written gives the bot's move (row, column),
+its score for the player to move and the statistics of the search, in the
+same order as the positions were read:
+
+    {"line": 1, "id": "a", "state": 0, "move": [1, 1], "value": 0, ...}
+
+A finished game has no move, and a line that is not a valid position -
+including a board where one player has more than one counter more than
+the other, which cannot come up in a game - gets "error" instead.
+
+Positions are read in chunks, which are shared out across a pool of worker
+processes, and only a few chunks are read ahead of the results being
+written, so memory use does not grow with the input. Each worker keeps one
+bot for every kind of position it is given, so the transposition table and
+move ordering history carry on from one position to the next.
+
+    python -m game.analyse positions.jsonl --workers 8 > results.jsonl
+    ... | python -m game.analyse --depth 4 --time-limit none
+"""
+
+import argparse
+import json
+import sys
+from collections import deque
+from itertools import islice
+from typing import Iterable, Iterator, Optional
+
+from .game_class import Bot, Game
+
+__all__ = ["analyse", "analyse_position"]
+
+# The bot each worker process analyses with, by the search settings and
+# the player, board size and k of the positions it is given
+_worker_bots: dict[tuple, Bot] = {}
+
+
+def _parse(line: str) -> tuple[dict, list[list[int]], int, int]:
+    """read one position
+
+    returns: the fields to copy to the result, the rows of the board, the
+    player to move and k
+    raises: ValueError if the line is not a valid position
+    """
+    try:
+        position = json.loads(line)
+    except json.JSONDecodeError:
+        raise ValueError("Invalid JSON")
+    if isinstance(position, list):
+        position = {"board": position}
+    if not isinstance(position, dict):
+        raise ValueError("Invalid position - must be a list or an object")
+    fields = {"id": position["id"]} if "id" in position else {}
+
+    rows = position.get("board")
+    if (
+        not isinstance(rows, list)
+        or not rows
+        or not all(
+            isinstance(row, list)
+            and len(row) == len(rows)
+            and all(square in (0, 1, 2) for square in row)
+            for row in rows
+        )
+    ):
+        raise ValueError("Invalid board - must be square, of 0, 1 and 2")
+    size = len(rows)
+
+    ones = sum(row.count(1) for row in rows)
+    twos = sum(row.count(2) for row in rows)
+    if abs(ones - twos) > 1:
+        raise ValueError(
+            "Invalid board - counter counts differ by more than 1"
+        )
+    player = position.get("player", 1 if ones <= twos else 2)
+    if player not in (1, 2):
+        raise ValueError("Invalid player")
+    k = position.get("k", size)
+    if not isinstance(k, int) or not 1 <= k <= size:
+        raise ValueError("Invalid k")
+    return fields, rows, player, k
+
+
+def analyse_position(line: str, settings: tuple) -> dict:
+    """find the bot's move in one position
+
+    line: the position, as one line of JSON
+    settings: the search options, as taken by analyse
+    returns: the result
+    """
+    max_size, *options = settings
+    try:
+        fields, rows, player, k = _parse(line)
+        if len(rows) > max_size:
+            raise ValueError("Invalid board - too large")
+    except ValueError as error:
+        return {"error": str(error)}
+
+    game = Game(board=rows, k=k)
+    result = {**fields, "state": game.check_for_win()}
+    if result["state"]:
+        return {**result, "move": None, "value": None}
+
+    key = (settings, player, game.size, k)
+    bot = _worker_bots.get(key)
+    if bot is None:
+        max_depth, time_limit, table_bytes, engine = options
+        bot = Bot(
+            player,
+            game.board,
+            table_bytes=table_bytes,
+            max_depth=max_depth,
+            time_limit=time_limit,
+            engine=engine,
+            stats=True,
+        )
+        _worker_bots[key] = bot
+    move = bot.choose_move(game)
+    return {
+        **result,
+        "move": list(move),
+        "value": bot.value,
+        "stats": bot.stats.as_dict(),
+    }
+
+
+def _analyse_chunk(chunk: list[tuple[int, str]], settings: tuple) -> list[str]:
+    """analyse a run of positions, in a worker process
+
+    chunk: the line number and line of each position
+    returns: the results, as lines of JSON
+    """
+    return [
+        json.dumps({"line": number, **analyse_position(line, settings)})
+        for number, line in chunk
+    ]
+
+
+def _chunks(
+    lines: Iterable[str], chunk_size: int
+) -> Iterator[list[tuple[int, str]]]:
+    """split the lines read into chunks, leaving out blank lines
+
+    returns: the line number and line of each position in each chunk
+    """
+    numbered = (
+        (number, line)
+        for number, line in enumerate(lines, 1)
+        if line and not line.isspace()
+    )
+    while True:
+        chunk = list(islice(numbered, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def analyse(
+    lines: Iterable[str],
+    workers: int = 1,
+    chunk_size: int = 256,
+    max_depth: Optional[int] = None,
+    time_limit: Optional[float] = 1.0,
+    table_bytes: int = 4 * 1024 * 1024,
+    engine: str = "alphabeta",
+    max_size: int = 15,
+) -> Iterator[str]:
+    """find the bot's move in each position read
+
+    lines: the positions, one line of JSON each
+    workers: the number of processes to analyse with - 1 analyses in this
+    process
+    chunk_size: the number of positions to hand to a worker at once
+    max_depth, time_limit, table_bytes, engine: the bot's search options
+    max_size: the largest board size to analyse
+    returns: the results, as lines of JSON, in the order the positions
+    were read
+    """
+    settings = (max_size, max_depth, time_limit, table_bytes, engine)
+    chunks = _chunks(lines, chunk_size)
+    if workers <= 1:
+        for chunk in chunks:
+            yield from _analyse_chunk(chunk, settings)
+        return
+
+    # Imported here, as only a pool needs it and it is slow to import
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # Keep every worker busy with a chunk waiting behind the one it is
+        # on, but read no further ahead than that
+        pending = deque()
+        for chunk in chunks:
+            pending.append(pool.submit(_analyse_chunk, chunk, settings))
+            if len(pending) >= 2 * workers:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+def _optional(value: str) -> Optional[float]:
+    """read a number that may be given as "none" for no limit"""
+    return None if value.lower() == "none" else float(value)
+
+
+def main():
+    """analyse positions from the command line"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "input",
+        nargs="?",
+        type=argparse.FileType("r"),
+        default=sys.stdin,
+        help="a file of positions, one per line (default stdin)",
+    )
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--chunk-size", type=int, default=256)
+    parser.add_argument("--depth", type=int, default=None)
+    parser.add_argument(
+        "--time-limit",
+        type=_optional,
+        default=1.0,
+        help="seconds per position, or none (default 1)",
+    )
+    parser.add_argument("--table-bytes", type=int, default=4 * 1024 * 1024)
+    parser.add_argument(
+        "--engine", choices=("alphabeta", "negamax"), default="alphabeta"
+    )
+    parser.add_argument("--max-size", type=int, default=15)
+    args = parser.parse_args()
+
+    results = analyse(
+        args.input,
+        workers=args.workers,
+        chunk_size=args.chunk_size,
+        max_depth=args.depth,
+        time_limit=args.time_limit,
+        table_bytes=args.table_bytes,
+        engine=args.engine,
+        max_size=args.max_size,
+    )
+    try:
+        for result in results:
+            sys.stdout.write(result + "\n")
+    except (BrokenPipeError, KeyboardInterrupt):
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -1,31 +1,56 @@
-from copy import deepcopy
-from typing import Optional, Union
-
-from .helpers import check_for_win, get_player_move
+from time import perf_counter
+from typing import Iterable, Optional, Union
+
+from .helpers import (
+    Board,
+    LineTracker,
+    MoveOrderer,
+    TranspositionTable,
+    get_player_move,
+)
+from .helpers.bitboard import iter_bits
+from .helpers.evaluation import WIN_SCORE, evaluate
+from .helpers.ordering import HEURISTICS
+from .helpers.stats import SearchStats
+from .helpers.threats import find_threats
+from .helpers.transposition import EXACT, LOWER, UPPER
 
 __all__ = ["Game"]
 
+# How each player's counters are shown, by player number
+COUNTERS = [" ", "o", "x"]
+
 
 class Game:
     def __init__(
         self,
         size: int = 3,
         board: Optional[list[list[Union[str, int]]]] = None,
+        k: Optional[int] = None,
     ):
         """create a new main_game object, consisting of an empty board
 
         size: the number of rows and columns on the board
         board: the main game board if a different board is required - this
         takes precedent over the size parameter
+        k: the number of counters in a row needed to win, by default the
+        size of the board - such as 5 on a 15x15 board for gomoku
         """
         # Create the game board
-        if board is None:
-            board = [[0] * size for _ in range(size)]
-        else:
+        if board is not None:
             if len(board) != len(board[0]):
                 raise ValueError("Invalid board - the board must be square")
             size = len(board)
-        self.board = deepcopy(board)
+        # The board holds the counter on each square, and a mask of each
+        # player's squares for checking for wins
+        self.board = (
+            Board(size, k=k) if board is None else Board.from_rows(board, k)
+        )
+        self.k = self.board.k
+
+        # The state of the game, as check_for_win, kept up to date as each
+        # move is placed
+        self.state = self.board.state()
 
         # Identify the number of moves
         self.moves = 0
@@ -33,22 +58,51 @@ class Game:
         # Store the size of the board
         self.size = size
 
-        # Get the possible counters
-        self.counters = [" ", "o", "x"]
-
         # Start with player 1
         self.current_player = 1
 
-        # Initialise the opponent
-        self.opponent = Bot(2, self.board)
+        # The opponent is only created once it is needed, as many games
+        # never use one
+        self._opponent = None
 
         # Record if the game is finished
         self.complete = False
 
+    @property
+    def opponent(self) -> "Bot":
+        """the bot playing as player 2, created the first time it is used"""
+        if self._opponent is None:
+            self._opponent = Bot(2, self.board)
+        return self._opponent
+
+    @opponent.setter
+    def opponent(self, bot: "Bot"):
+        """play against a differently configured bot"""
+        self._opponent = bot
+
     def place(self, player: int, i: int, j: int):
-        """place a counter on square (i, j)"""
-        self.board[i][j] = player
+        """place a counter on square (i, j)
+
+        raises: ValueError if the square is off the board or already has a
+        counter on it
+        """
+        # Squares are numbered across the rows, so a column off the end of
+        # one row would otherwise land on the next
+        if not (0 <= i < self.size and 0 <= j < self.size):
+            raise ValueError(f"Invalid move - ({i}, {j}) is off the board")
+        square = i * self.size + j
+        # The board does not check the square is free before making a move
+        if self.board.cells[square]:
+            raise ValueError(f"Invalid move - ({i}, {j}) is already taken")
+        self.board.make(square, player)
         self.moves += 1
+        # Only lines through the new counter can have been completed
+        if not self.state:
+            self.state = self.board.move_state(square)
+        # Keep the opponent's board up to date move by move, rather than
+        # having it copy the whole board before each of its moves
+        if self._opponent is not None:
+            self._opponent.play(player, i, j)
 
     def check_for_win(self):
         """checks the board (a 3x3 array) to see whether there are 3 in a row the same
@@ -58,7 +112,7 @@ class Game:
         -1: main_game ended with a draw
         1: Player 1 won
         2: Player 2 won"""
-        return check_for_win(self.board)
+        return self.state
 
     def visualise(self):
         """Display the board in a nice way"""
@@ -83,7 +137,7 @@ class Game:
                 + "|"
                 + "|".join(
                     [
-                        (" " + self.counters[self.board[r][c]] + " ").center(3)
+                        (" " + COUNTERS[self.board[r][c]] + " ").center(3)
                         for c in range(self.size)
                     ]
                 )
@@ -93,8 +147,12 @@ class Game:
         # Add a blank line at the bottom
         print("\n")
 
-    def game_loop(self):
-        """the main game loop"""
+    def game_loop(self, record: Optional[str] = None):
+        """the main game loop
+
+        record: a directory to append the finished game to, in the format
+        of game.records
+        """
 
         # Display starting instructions
         print("You're playing tic-tac-toe!")
@@ -129,26 +187,160 @@ class Game:
             # Change the player
             self.current_player = self.current_player % 2 + 1
 
+        # Keep the game, if asked to
+        if record is not None:
+            # Imported here, as the records are built on this module
+            from .records import RecordWriter
+
+            with RecordWriter(record) as writer:
+                writer.write(self)
+
         # Display the end result
         print("Thanks for playing!")
 
 
+# The search engines Bot can use
+ENGINES = ("alphabeta", "negamax")
+
+# A bound beyond any score, kept as an integer for null-window searches
+INFINITY = WIN_SCORE + 1
+
+# The transposition table holds scores for the bot, so positions where the
+# opponent is to move have this XORed into their Zobrist key to tell them
+# apart from the same board with the bot to move
+OPPONENT = 0x9A3C_5E71_D2B4_6F08
+
+
+class SearchTimeout(Exception):
+    """raised inside Bot.alphabeta when the time for a move has run out, or
+    the search has been cancelled"""
+
+
 class Bot:
-    def __init__(self, player: int, board: list[list[Union[str, int]]]):
+    def __init__(
+        self,
+        player: int,
+        board: list[list[Union[str, int]]],
+        table_bytes: int = 4 * 1024 * 1024,
+        table_policy: str = "depth",
+        max_depth: Optional[int] = None,
+        time_limit: Optional[float] = 1.0,
+        perfect_play: bool = True,
+        ordering: Iterable[str] = HEURISTICS,
+        engine: str = "alphabeta",
+        workers: int = 1,
+        stats: bool = False,
+        trace: Optional[str] = None,
+        k: Optional[int] = None,
+    ):
         """Initialse the bot player
 
         board: a 'square' board grid of locations
+        table_bytes: the memory the transposition table may use - 0 turns
+        the table off
+        table_policy: the replacement policy of the transposition table,
+        one of "always", "depth" or "two-tier"
+        max_depth: the most moves ahead to look, None to search to the end
+        of the game
+        time_limit: the most seconds to spend choosing a move, None for no
+        limit
+        perfect_play: look moves up in the precomputed table of solved
+        positions, where one has been built for the board size - the 3x3
+        table or the 4x4 retrograde database
+        ordering: the move ordering heuristics to use, any of "hash",
+        "tactics", "killer", "history" and "static" - none at all tries the
+        moves in row-major order
+        engine: the search to use, "alphabeta" for minimax with alpha-beta
+        pruning or "negamax" for principal variation search with aspiration
+        windows
+        workers: the number of processes to share the moves at the root of
+        the search between - the pool is started on the first move and kept
+        until close() is called
+        stats: collect statistics on each search in self.stats - with
+        several workers, only the part of the search run in this process is
+        counted
+        trace: a file to append the statistics of each move to, as one line
+        of JSON - this turns stats on
+        k: the number of counters in a row needed to win, by default that
+        of the board if it is a Board, otherwise the size of the board
         """
+        if engine not in ENGINES:
+            raise ValueError(
+                "Invalid engine - must be one of " + ", ".join(ENGINES)
+            )
         self.current_player = player
         self.board_size = len(board)
-        self.board = deepcopy(board)
+        if k is None:
+            k = board.k if isinstance(board, Board) else self.board_size
+        self.k = k
+        self.update_board(board)
+
+        # Limits on how long to search for
+        self.max_depth = max_depth
+        self.time_limit = time_limit
+        self.deadline = None
+        self.perfect_play = perfect_play
+
+        # Set from another thread by cancel() to stop the search early
+        self.cancelled = False
+
+        # Puts the moves at each node in the order they should be tried
+        self.orderer = MoveOrderer(self.board_size, ordering, k)
+
+        # The search to use, and the score it found for the last move, which
+        # centres the aspiration window of the next search
+        self.engine = engine
+        self.last_score = None
+
+        # The worker processes for a parallel search, started when needed
+        self.workers = workers
+        self.pool = None
+
+        # The number of positions searched, and whether any line of play was
+        # cut off by the depth limit rather than played to the end
+        self.nodes = 0
+        self.truncated = False
+
+        # The score of the last move chosen for the bot, WIN_SCORE for a
+        # forced win, or None if it answered a threat without searching
+        self.value = None
+
+        # Statistics on the last move chosen, which are only collected when
+        # asked for, as they slow the search down
+        self.collect_stats = stats or trace is not None
+        self.trace = trace
+        self.stats = None
+
+        # Search results are cached by position for the life of the bot, so
+        # positions seen while choosing one move are reused for the next
+        self.table = (
+            TranspositionTable(table_bytes, table_policy)
+            if table_bytes
+            else None
+        )
 
     def update_board(self, board: list[list[Union[str, int]]]):
         """Update the board the bot is playing on
 
         board: a 'square' board grid of locations
         """
-        self.board = deepcopy(board)
+        self.board = Board.from_rows(board, self.k)
+        # Line counts let the search check only the lines through each move
+        self.lines = LineTracker(self.board_size, self.board.masks, self.k)
+
+    def play(self, player: int, i: int, j: int):
+        """Record a move made in the game on the bot's board
+
+        player: the player who made the move
+        i, j: the row and column of the square played on
+        """
+        square = i * self.board_size + j
+        # A square that is already taken means the boards no longer agree,
+        # which choose_move sorts out by copying the game's board
+        if self.board.cells[square]:
+            return
+        self.board.make(square, player)
+        self.lines.place(player, square)
 
     def valid_moves(self) -> list[tuple[int]]:
         """Find the valid moves available
@@ -157,10 +349,8 @@ class Bot:
         counter on them
         """
         return [
-            (i, j)
-            for i in range(self.board_size)
-            for j in range(self.board_size)
-            if self.board[i][j] == 0
+            divmod(square, self.board_size)
+            for square in self.board.empty_squares()
         ]
 
     def alphabeta(
@@ -168,6 +358,7 @@ class Bot:
         max_player: bool = True,
         alpha: float = -float("inf"),
         beta: float = float("inf"),
+        depth: Optional[int] = None,
     ) -> tuple[int, tuple]:
         """Recursive function to simulate all possible moves, and use
         alpha-beta pruning to choose the optimum one
@@ -178,24 +369,53 @@ class Bot:
         bot player.
         beta: The best (lowest-value) score that has been identified for the
         human player.
+        depth: How many more moves to look ahead before estimating the score
+        of the board, None to play every line to the end.
         returns: The score for the round, and the move that should be played
         next to have the best chance of achieving it.
         """
-        # Check if the board is in a win state (base case)
-        win_state = check_for_win(self.board)
+        # Check if the board is in a win state (base case) - this includes
+        # a draw as soon as no line can be completed
+        lines = self.lines
+        win_state = lines.state()
+
+        # Count the position, if statistics are being collected
+        stats = self.stats
+        if stats is not None:
+            stats.node(lines.filled, win_state)
 
         # Check if one of the players won
         if win_state in (1, 2):
             # If the bot won, then return a 'positive' result
             if win_state == self.current_player:
-                return 1, None
+                return WIN_SCORE, None
             # If the bot didn't win, return a 'negative' result
             else:
-                return -1, None
+                return -WIN_SCORE, None
         # If the game ended in a draw, then return a 'neutral' result
         elif win_state == -1:
             return 0, None
 
+        # Stop if the time for this move has run out
+        self.nodes += 1
+        if self.deadline is not None and not self.nodes & 1023:
+            if self.cancelled or perf_counter() > self.deadline:
+                raise SearchTimeout
+
+        # If this is as far ahead as we can look, estimate the score instead
+        if depth == 0:
+            self.truncated = True
+            if stats is not None:
+                stats.evaluated += 1
+            return evaluate(lines, self.current_player), None
+
+        # Moves are made and taken back on the board as they are tried
+        board = self.board
+
+        # The number of moves ahead this search will look
+        empty = len(board.empties)
+        remaining = empty if depth is None else min(depth, empty)
+
         # If the player is the one that we are trying to make 'win'
         if max_player:
             # Playing as the bot
@@ -211,14 +431,59 @@ class Bot:
         # Set the best move as a default value of None
         best_move = None
 
-        # Check each move in turn to find the best one
-        for move in self.valid_moves():
-
+        # Check whether this position has been searched before
+        table = self.table
+        hash_move = None
+        if table is not None:
+            key = board.zobrist if max_player else board.zobrist ^ OPPONENT
+            entry = table.probe(key)
+            # Even a result that did not look far enough ahead suggests
+            # which move to try first
+            if entry is not None:
+                hash_move = entry[3]
+            # Only results that looked at least as far ahead can be used
+            if entry is not None and entry[0] >= remaining:
+                searched, value, bound, move = entry
+                if move is not None:
+                    move = divmod(move, self.board_size)
+                # The stored result may itself have stopped at a depth limit
+                if searched < empty:
+                    self.truncated = True
+                # An exact value can be used as it is, while a bound narrows
+                # the window, and may close it
+                if bound == EXACT:
+                    return value, move
+                elif bound == LOWER:
+                    alpha = max(alpha, value)
+                else:
+                    beta = min(beta, value)
+                if beta <= alpha:
+                    return value, move
+                # The move stored with a bound in the player's favour is
+                # known to reach that value, so it is the move to beat
+                if move is not None and max_player == (bound == LOWER):
+                    best_value, best_move = value, move
+            # Keep the window the search started with to classify the result
+            alpha_start, beta_start = alpha, beta
+
+        # Check each move in turn to find the best one, starting with the
+        # moves most likely to be good
+        ply = lines.filled
+        moves = self.orderer.order(
+            board.empty(), lines, player, ply, hash_move
+        )
+        for index, square in enumerate(moves):
             # Mock 'play' that move on the current board
-            self.board[move[0]][move[1]] = player
+            board.make(square, player)
+            lines.place(player, square)
 
             # Identify the outcome by continuing to play
-            val, _ = self.alphabeta(not max_player, alpha, beta)
+            val, _ = self.alphabeta(
+                not max_player,
+                alpha,
+                beta,
+                None if depth is None else depth - 1,
+            )
 
             if max_player:
                 # Work out whether the current 'max' value or the new 'score'
@@ -235,28 +500,429 @@ class Bot:
             if update_best:
 
                 # This becomes the next best move and we update the score
-                best_move = move
+                best_move = divmod(square, self.board_size)
                 best_value = val
 
             # Reset the move on the board
-            self.board[move[0]][move[1]] = 0
+            board.unmake()
+            lines.undo(player, square)
 
             # 'Prune' this branch if it doesn't look like it's going to
             # win
             if beta <= alpha:
+                self.orderer.cutoff(player, square, ply, remaining)
+                if stats is not None:
+                    stats.cutoff(ply, index)
                 break
 
+        # Store the result, noting whether the window cut the search short
+        if table is not None:
+            if best_value <= alpha_start:
+                bound = UPPER
+            elif best_value >= beta_start:
+                bound = LOWER
+            else:
+                bound = EXACT
+            # The table holds moves by square
+            move = None
+            if best_move is not None:
+                move = best_move[0] * self.board_size + best_move[1]
+            table.store(key, remaining, best_value, bound, move)
+
         # Once all potential moves have been simulated, return the best
         # option, as well as the score
         return best_value, best_move
 
+    def negamax(
+        self,
+        player: int,
+        alpha: int = -INFINITY,
+        beta: int = INFINITY,
+        depth: Optional[int] = None,
+    ) -> tuple[int, tuple]:
+        """Principal variation search, scoring every position for the player
+        whose turn it is
+
+        The first move at each node is searched with the full window. Every
+        other move is first checked with a null window, which only asks
+        whether it beats the best so far, and is only searched in full if
+        it does.
+
+        player: The player whose turn it is
+        alpha: The score the player to move is already sure of
+        beta: The score the opponent will not let the player go beyond
+        depth: How many more moves ahead to look before estimating the score
+        of the board, None to play every line to the end.
+        returns: The score for the player to move, and the best move
+        """
+        # Check if the board is in a win state (base case) - only the
+        # player who just moved can have won
+        lines = self.lines
+        win_state = lines.state()
+        stats = self.stats
+        if stats is not None:
+            stats.node(lines.filled, win_state)
+        if win_state in (1, 2):
+            return -WIN_SCORE, None
+        elif win_state == -1:
+            return 0, None
+
+        # Stop if the time for this move has run out
+        self.nodes += 1
+        if self.deadline is not None and not self.nodes & 1023:
+            if self.cancelled or perf_counter() > self.deadline:
+                raise SearchTimeout
+
+        # If this is as far ahead as we can look, estimate the score instead
+        if depth == 0:
+            self.truncated = True
+            if stats is not None:
+                stats.evaluated += 1
+            return evaluate(lines, player), None
+
+        board = self.board
+        empty = len(board.empties)
+        remaining = empty if depth is None else min(depth, empty)
+        best_value = -INFINITY
+        best_move = None
+
+        # The table holds scores for the bot, so flip them for the opponent
+        bot_to_move = player == self.current_player
+        table = self.table
+        hash_move = None
+        if table is not None:
+            key = board.zobrist if bot_to_move else board.zobrist ^ OPPONENT
+            entry = table.probe(key)
+            if entry is not None:
+                hash_move = entry[3]
+            if entry is not None and entry[0] >= remaining:
+                searched, value, bound, move = entry
+                if move is not None:
+                    move = divmod(move, self.board_size)
+                if searched < empty:
+                    self.truncated = True
+                if not bot_to_move:
+                    value = -value
+                    bound = {EXACT: EXACT, LOWER: UPPER, UPPER: LOWER}[bound]
+                if bound == EXACT:
+                    return value, move
+                elif bound == LOWER:
+                    alpha = max(alpha, value)
+                else:
+                    beta = min(beta, value)
+                if beta <= alpha:
+                    return value, move
+                # A lower bound comes with a move known to reach it
+                if move is not None and bound == LOWER:
+                    best_value, best_move = value, move
+            alpha_start, beta_start = alpha, beta
+
+        ply = lines.filled
+        child_depth = None if depth is None else depth - 1
+        moves = self.orderer.order(
+            board.empty(), lines, player, ply, hash_move
+        )
+        for n, square in enumerate(moves):
+            board.make(square, player)
+            lines.place(player, square)
+
+            if n == 0:
+                val = -self.negamax(3 - player, -beta, -alpha, child_depth)[0]
+            else:
+                # Check the move cannot beat the best so far, and only
+                # search it properly if it can
+                val = -self.negamax(
+                    3 - player, -alpha - 1, -alpha, child_depth
+                )[0]
+                if alpha < val < beta:
+                    val = -self.negamax(
+                        3 - player, -beta, -alpha, child_depth
+                    )[0]
+
+            board.unmake()
+            lines.undo(player, square)
+
+            if val > best_value:
+                best_value = val
+                best_move = divmod(square, self.board_size)
+            alpha = max(alpha, val)
+            if alpha >= beta:
+                self.orderer.cutoff(player, square, ply, remaining)
+                if stats is not None:
+                    stats.cutoff(ply, n)
+                break
+
+        # Store the result for the bot, as the other engine does
+        if table is not None:
+            if best_value <= alpha_start:
+                bound = UPPER
+            elif best_value >= beta_start:
+                bound = LOWER
+            else:
+                bound = EXACT
+            value = best_value
+            if not bot_to_move:
+                value = -value
+                bound = {EXACT: EXACT, LOWER: UPPER, UPPER: LOWER}[bound]
+            # The table holds moves by square
+            move = None
+            if best_move is not None:
+                move = best_move[0] * self.board_size + best_move[1]
+            table.store(key, remaining, value, bound, move)
+
+        return best_value, best_move
+
+    def aspiration_search(self, depth: Optional[int]) -> tuple[int, tuple]:
+        """Run negamax with a narrow window around the last score found,
+        widening it only if the score falls outside
+
+        depth: How many moves ahead to look
+        returns: The score and the best move
+        """
+        if self.last_score is None:
+            return self.negamax(self.current_player, depth=depth)
+        # Roughly the value of one line that is one counter from complete
+        margin = 10 ** max(0, self.k - 2)
+        alpha = max(-INFINITY, self.last_score - margin)
+        beta = min(INFINITY, self.last_score + margin)
+        value, move = self.negamax(self.current_player, alpha, beta, depth)
+        # Outside the window the score is only a bound, so search again
+        # with the full window
+        if not alpha < value < beta:
+            value, move = self.negamax(self.current_player, depth=depth)
+        return value, move
+
+    def root_moves(self) -> list[int]:
+        """The squares the bot can play on, in the order to search them"""
+        hash_move = None
+        if self.table is not None:
+            entry = self.table.probe(self.board.zobrist)
+            if entry is not None:
+                hash_move = entry[3]
+        return self.orderer.order(
+            self.board.empty(),
+            self.lines,
+            self.current_player,
+            self.lines.filled,
+            hash_move,
+        )
+
+    def search_root_move(
+        self, square: int, alpha: int, depth: Optional[int]
+    ) -> int:
+        """Score one of the bot's moves from the current board
+
+        square: the square to play on
+        alpha: the score the bot is already sure of from other moves
+        depth: how many moves ahead to look, including this one
+        returns: the score of the move, which is at most alpha if the move
+        is no better than that
+        """
+        player = self.current_player
+        child_depth = None if depth is None else depth - 1
+        self.board.make(square, player)
+        self.lines.place(player, square)
+        if self.engine == "negamax":
+            value = -self.negamax(
+                player % 2 + 1, -INFINITY, -alpha, child_depth
+            )[0]
+        else:
+            value = self.alphabeta(False, alpha, INFINITY, child_depth)[0]
+        self.board.unmake()
+        self.lines.undo(player, square)
+        return value
+
+    def worker_settings(self) -> tuple:
+        """The options a worker process needs to search like this bot"""
+        return (
+            self.current_player,
+            self.board_size,
+            0 if self.table is None else self.table.max_bytes,
+            "depth" if self.table is None else self.table.policy,
+            self.orderer.heuristics,
+            self.engine,
+            self.k,
+        )
+
+    def root_split(self, depth: Optional[int]) -> tuple[int, tuple]:
+        """Search the moves at the root across the worker processes
+
+        depth: how many moves ahead to look
+        returns: The score and the best move
+        """
+        # Imported here, as the parallel search is built on this module
+        from .parallel import RootSplitPool
+
+        if self.pool is None:
+            self.pool = RootSplitPool(self.workers)
+        return self.pool.search(self, depth)
+
+    def close(self):
+        """Stop any worker processes the bot started"""
+        if self.pool is not None:
+            self.pool.close()
+            self.pool = None
+
+    def iterative_deepening(self) -> tuple[int, tuple]:
+        """Search one move further ahead at a time, until the end of the game,
+        the depth limit or the time limit is reached
+
+        returns: The score and move from the deepest search that finished
+        """
+        empty = len(self.board.empties)
+        if self.max_depth is not None:
+            empty = min(self.max_depth, empty)
+        # Without a time limit the deadline is never reached, but is still
+        # checked so that the search can be cancelled
+        start = perf_counter()
+        if self.time_limit is not None:
+            self.deadline = start + self.time_limit
+        else:
+            self.deadline = float("inf")
+
+        # A search that runs out of time stops part way through its moves,
+        # so note how many had been made to take the rest back
+        made = len(self.board.history)
+
+        best = 0, None
+        try:
+            for depth in range(1, empty + 1):
+                self.truncated = False
+                if self.workers > 1:
+                    best = self.root_split(depth)
+                elif self.engine == "negamax":
+                    best = self.aspiration_search(depth)
+                    self.last_score = best[0]
+                else:
+                    best = self.alphabeta(depth=depth)
+                # Looking further ahead changes nothing once every line of
+                # play has been followed to the end, or a win is forced
+                if self.stats is not None:
+                    self.stats.iterations.append(
+                        {
+                            "depth": depth,
+                            "nodes": self.stats.total_nodes(),
+                            "seconds": perf_counter() - start,
+                        }
+                    )
+                if not self.truncated or abs(best[0]) == WIN_SCORE:
+                    break
+        except SearchTimeout:
+            # Put the board back to how it was before the search
+            while len(self.board.history) > made:
+                self.board.unmake()
+            self.lines = LineTracker(self.board_size, self.board.masks, self.k)
+        finally:
+            self.deadline = None
+        return best
+
+    def lookup_move(self) -> Optional[tuple[int]]:
+        """Find the best move in the table of solved positions
+
+        returns: the move, or None if the position has not been solved
+        """
+        if self.k != self.board_size:
+            return None
+        # Imported here so the tables can be built with
+        # python -m game.helpers.perfect_play and
+        # python -m game.helpers.retrograde
+        from .helpers.perfect_play import load_table
+        from .helpers.retrograde import load_database
+
+        # The 3x3 table, or the database of a board solved by retrograde
+        # analysis, which can be looked up in the same way
+        table = load_table()
+        if table is None or table.size != self.board_size:
+            table = load_database(self.board_size)
+        if table is None:
+            return None
+        result = table.lookup(*self.board.masks[1:])
+        # The table is only of use if it is the bot's turn in the position
+        if result is None or result[0] != self.current_player:
+            return None
+        if result[2] is None:
+            return None
+        self.value = result[1] * WIN_SCORE
+        return divmod(result[2], self.board_size)
+
+    def threat_move(self) -> Optional[tuple[int]]:
+        """Find a move the threats on the board call for, when fewer in a
+        row than the size of the board are needed to win
+
+        returns: in order of preference, a move that wins at once, one that
+        blocks the opponent's win, one that makes an open run the opponent
+        cannot stop, or one that stops the opponent making one - or None if
+        there are no threats
+        """
+        masks = self.board.masks
+        player = self.current_player
+        mine = find_threats(masks, player, self.board_size, self.k)
+        theirs = find_threats(masks, 3 - player, self.board_size, self.k)
+        for squares in (mine.wins, theirs.wins, mine.threes, theirs.threes):
+            if squares:
+                # Of several squares, take the one on the most lines
+                square = max(
+                    iter_bits(squares), key=self.orderer.static.__getitem__
+                )
+                return divmod(square, self.board_size)
+        return None
+
     def choose_move(self, game: Game) -> tuple[int]:
         """Get the best next move
 
+        A cancel made while no search is running stops the next one, and
+        each search clears it once it is done, so a cancel never carries
+        over to the search after that.
+
         returns: the integer row, column move as a tuple
         """
-        # Update the bot's board with the latest layout in the game
-        self.update_board(game.board)
-        # Get the 'best' available move
-        _, move = self.alphabeta()
+        # The bot's board is kept up to date by play(), so it only needs
+        # copying from the game if the two have got out of step
+        if self.board.masks != game.board.masks:
+            self.update_board(game.board)
+        # Let the history from earlier moves fade
+        self.orderer.age()
+        if self.collect_stats:
+            self.stats = SearchStats(self.lines.filled)
+            start = perf_counter()
+            hits = 0 if self.table is None else self.table.hits
+        self.value = None
+        # Solved positions need no search
+        move = self.lookup_move() if self.perfect_play else None
+        source = "table"
+        # Nor do threats that have to be answered, in k in a row games
+        if move is None and self.k < self.board_size:
+            move = self.threat_move()
+            source = "threats"
+        if move is not None:
+            if self.stats is not None:
+                self.stats.source = source
+        else:
+            # Get the 'best' available move
+            try:
+                self.value, move = self.iterative_deepening()
+            finally:
+                # The cancel has done its job
+                self.cancelled = False
+            # A drawn board has no best move, so any free square will do
+            if move is None:
+                move = self.valid_moves()[0]
+        if self.stats is not None:
+            self.stats.seconds = perf_counter() - start
+            if self.table is not None:
+                self.stats.table_hits = self.table.hits - hits
+            if self.trace is not None:
+                self.stats.write(
+                    self.trace, player=self.current_player, move=list(move)
+                )
         return move
+
+    def cancel(self):
+        """Stop a search running in another thread as soon as possible, so
+        that choose_move returns the best move found so far
+
+        A cancel made just before choose_move starts stops that search. With
+        several workers, the search stops once the next worker finishes the
+        move it is on.
+        """
+        self.cancelled = True
@@ -1,9 +1,197 @@
+import queue
+import threading
 import tkinter as tk
-from copy import deepcopy
+from typing import Optional
+
+from .game_class import COUNTERS, Game
+from .mcts import MCTSBot
+from .ultimate import UltimateGame
+
+__all__ = ["BoardCanvas", "TicTacToeWindow", "TicTacToeWindowIn2D"]
+
+# The space around the grid on a BoardCanvas, in pixels
+PAD = 4
+
+# The background of the squares the next move can be made in
+HIGHLIGHT = "#ffb0b0"
+
+# How often to check whether the bot has chosen its move, in milliseconds
+POLL_MS = 15
+
+
+class BoardCanvas(tk.Canvas):
+    """a grid of squares drawn on a single canvas
+
+    The grid is drawn once, with a background and a counter item for each
+    square. Items are only reconfigured when what they show changes, so
+    redrawing the board after a move touches just the squares that moved,
+    and a new game reuses the same items. The squares can be grouped into
+    blocks, such as the small games of the 2D board, each of which can be
+    covered by a single large counter.
+    """
+
+    def __init__(
+        self,
+        master: tk.Misc,
+        size: int,
+        square: int,
+        font_size: int,
+        block: Optional[int] = None,
+        on_click=None,
+    ):
+        """draw an empty grid
+
+        size: the number of rows and columns of squares
+        square: the width of each square, in pixels
+        font_size: the size of the counters
+        block: the number of rows and columns of squares in each block,
+        None for the whole grid as one block
+        on_click: called with the row and column of a square clicked on
+        """
+        self.board_size = size
+        self.square = square
+        self.block = size if block is None else block
+        side = size * square
+        super().__init__(
+            master,
+            width=side + 2 * PAD,
+            height=side + 2 * PAD,
+            bg="white",
+            highlightthickness=0,
+        )
 
-from .game_class import Game
+        # what each option of each item is set to, by (item, option)
+        self.shown = {}
+
+        # a background and a counter for each square, in row-major order
+        self.backgrounds = []
+        self.counters = []
+        font = ("Courier", font_size, "bold")
+        for row in range(size):
+            for column in range(size):
+                x, y = PAD + column * square, PAD + row * square
+                self.backgrounds.append(
+                    self.create_rectangle(
+                        x, y, x + square, y + square, fill="white", outline=""
+                    )
+                )
+                self.counters.append(
+                    self.create_text(
+                        x + square / 2, y + square / 2, text="", font=font
+                    )
+                )
 
-__all__ = ["TicTacToeWindow", "TicTacToeWindowIn2D"]
+        # the grid lines, thicker around each block
+        for n in range(size + 1):
+            width = 3 if n % self.block == 0 else 1
+            offset = PAD + n * square
+            self.create_line(offset, PAD, offset, PAD + side, width=width)
+            self.create_line(PAD, offset, PAD + side, offset, width=width)
+
+        # a hidden cover for each block, with a large counter on it
+        self.covers = []
+        extent = self.block * square
+        blocks = size // self.block
+        font = ("Courier", font_size * self.block, "bold")
+        for row in range(blocks):
+            for column in range(blocks):
+                x, y = PAD + column * extent, PAD + row * extent
+                self.covers.append(
+                    (
+                        self.create_rectangle(
+                            x + 2,
+                            y + 2,
+                            x + extent - 2,
+                            y + extent - 2,
+                            fill="white",
+                            outline="",
+                            state=tk.HIDDEN,
+                        ),
+                        self.create_text(
+                            x + extent / 2,
+                            y + extent / 2,
+                            text="",
+                            font=font,
+                            state=tk.HIDDEN,
+                        ),
+                    )
+                )
+
+        # note how the items start, so clear() leaves an empty board alone
+        for item in self.backgrounds:
+            self.shown[item, "fill"] = "white"
+        for item in self.counters:
+            self.shown[item, "text"] = ""
+            self.shown[item, "fill"] = "black"
+        for rectangle, counter in self.covers:
+            self.shown[rectangle, "state"] = tk.HIDDEN
+            self.shown[counter, "state"] = tk.HIDDEN
+            self.shown[counter, "text"] = ""
+
+        if on_click is not None:
+            self.bind("<Button-1>", lambda event: self.click(event, on_click))
+
+    def configure_item(self, item: int, option: str, value):
+        """set an option of an item, if it is not already set to value"""
+        if self.shown.get((item, option)) != value:
+            self.itemconfigure(item, {option: value})
+            self.shown[item, option] = value
+
+    def draw_counter(
+        self,
+        row: int,
+        column: int,
+        text: Optional[str] = None,
+        colour: Optional[str] = None,
+    ):
+        """redraw the counter on a square
+
+        text: the counter to show, None to leave it as it is
+        colour: the colour to show it in, None to leave it as it is
+        """
+        item = self.counters[row * self.board_size + column]
+        if text is not None:
+            self.configure_item(item, "text", text)
+        if colour is not None:
+            self.configure_item(item, "fill", colour)
+
+    def draw_background(self, row: int, column: int, colour: str):
+        """change the background of a square"""
+        item = self.backgrounds[row * self.board_size + column]
+        self.configure_item(item, "fill", colour)
+
+    def cover(self, row: int, column: int, text: Optional[str] = None):
+        """cover a block with a large counter
+
+        row, column: the position of the block
+        text: the counter to show, None to uncover the block
+        """
+        rectangle, counter = self.covers[
+            row * (self.board_size // self.block) + column
+        ]
+        state = tk.HIDDEN if text is None else tk.NORMAL
+        self.configure_item(rectangle, "state", state)
+        self.configure_item(counter, "state", state)
+        if text is not None:
+            self.configure_item(counter, "text", text)
+
+    def clear(self):
+        """empty every square, for a new game"""
+        for row in range(self.board_size):
+            for column in range(self.board_size):
+                self.draw_counter(row, column, "", "black")
+                self.draw_background(row, column, "white")
+        blocks = self.board_size // self.block
+        for row in range(blocks):
+            for column in range(blocks):
+                self.cover(row, column)
+
+    def click(self, event: tk.Event, on_click):
+        """pass a click on to on_click as the square clicked on"""
+        row = (event.y - PAD) // self.square
+        column = (event.x - PAD) // self.square
+        if 0 <= row < self.board_size and 0 <= column < self.board_size:
+            on_click(row, column)
 
 
 class TicTacToeWindow(tk.Tk):
@@ -17,58 +205,28 @@ class TicTacToeWindow(tk.Tk):
         self.title("Tic Tac Toe")
         # Create a 'game' instance
         self.game = Game()
+        # The bot searches on a worker thread, which hands its move back
+        # through this queue, tagged with the number of the search, so the
+        # window keeps responding while it thinks
+        self.moves = queue.Queue()
+        self.search = 0
+        self.searching = False
         # Create the basic outline
         self.create_gameboard_widget("Your Turn! Click a square to begin.")
 
     def create_gameboard_widget(self, status: str):
-        """initialise the main_game board graphics
+        """initialise the main_game board graphics, which are kept for every
+        game after the first
 
         status: the message to display on the page
         """
 
-        # reset the board
-        try:
-            # remove previous main_game boards
-            self.gameboard.destroy()
-            self.message.destroy()
-            self.button_play.destroy()
-            self.button_cancel.destroy()
-        except Exception:
-            pass
-
-        # add the main_game board outline
-        self.gameboard = tk.Frame(height=300, width=300, bd=3, relief=tk.RIDGE)
+        # add the main_game board, drawn on a single canvas
+        self.gameboard = BoardCanvas(
+            self, 3, 100, 48, on_click=self.on_mouse_down
+        )
         self.gameboard.pack(padx=20, pady=20)
 
-        # add the labels in the grid
-        self.labels = [[0] * 3 for _ in range(3)]
-        for r in range(3):
-            # set the rowheight
-            self.gameboard.rowconfigure(r, minsize=100)
-            for c in range(3):
-                # set the column width
-                self.gameboard.columnconfigure(c, minsize=100)
-                # create a label with the correct counter displayed on it
-                label = tk.Label(
-                    self.gameboard,
-                    font=("Courier", 48, "bold"),
-                    bd=1,
-                    relief=tk.RIDGE,
-                    text=self.game.counters[self.game.board[r][c]],
-                )
-                # expand the label to fit the grid
-                label.grid(sticky=tk.E + tk.W + tk.N + tk.S, row=r, column=c)
-                # add a click event to the label
-                label.bind(
-                    "<Button-1>",
-                    lambda event, arg={
-                        "row": r,
-                        "column": c,
-                    }: self.on_mouse_down(event, arg),
-                )
-                # add the label to the graphic list of labels
-                self.labels[r][c] = label
-
         # add the status label
         self.message = tk.Label(text=status)
         self.message.pack(padx=20, fill=tk.X)
@@ -84,22 +242,18 @@ class TicTacToeWindow(tk.Tk):
         self.button_cancel.pack(padx=20, pady=20, fill=tk.X)
 
     def update_board(self, r: int, c: int, status: str):
-        """replace the counter in the label in position r,c in the grid
+        """replace the counter in position r,c in the grid
         and update the message label to read status"""
 
-        # update label
-        self.labels[r][c].config(
-            text=self.game.counters[self.game.board[r][c]]
-        )
+        # update the square
+        self.gameboard.draw_counter(r, c, COUNTERS[self.game.board[r][c]])
         # update message
         self.message.config(text=status)
 
-    def on_mouse_down(self, _, arg: dict):
-        """event handler for clicking the labels"""
+    def on_mouse_down(self, r: int, c: int):
+        """event handler for clicking the squares"""
         # check whether it is the correct turn
         if self.game.current_player == 1:
-            r = arg["row"]
-            c = arg["column"]
             # if that is a possible move
             if self.game.board[r][c] == 0:
                 # place the new counter, and allow the computer to play
@@ -107,14 +261,17 @@ class TicTacToeWindow(tk.Tk):
 
     def reset(self):
         """restarts the main_game"""
+        # stop the bot thinking about the old game
+        self.stop_search()
         # create a new main_game
         self.game = Game()
-        # update display
-        self.create_gameboard_widget("Your Turn! Click a square to begin.")
+        # empty the board that is already drawn
+        self.gameboard.clear()
+        self.message.config(text="Your Turn! Click a square to begin.")
 
     def play_game(self, r: int, c: int):
         """simulates a main_game play. r and c will refer to the grid
-        reference of the label they will have clicked
+        reference of the square they will have clicked
 
         r: the row clicked
         c: the column clicked
@@ -129,13 +286,68 @@ class TicTacToeWindow(tk.Tk):
             self.game.current_player = 2
             # update the board
             self.update_board(r, c, "Waiting...")
-            # allow the computer to play
-            r, c = self.opponent_turn()
-            # if computer not won, then change the player to player 1
-            if not self.win_message(r, c):
-                self.game.current_player = 1
-                # update the board
-                self.update_board(r, c, "Your turn!")
+            # allow the computer to play, without holding up the window
+            self.start_search()
+
+    def start_search(self):
+        """start the computer choosing its move on a worker thread"""
+        self.search += 1
+        self.searching = True
+        search, game, bot = self.search, self.game, self.game.opponent
+        # cleared here rather than in the thread, so that the cancel button
+        # works from the moment the search is started
+        bot.cancelled = False
+
+        def choose():
+            # an error is handed back in place of the move, so that the
+            # window can show it rather than waiting forever
+            try:
+                self.moves.put((search, bot.choose_move(game)))
+            except Exception as error:
+                self.moves.put((search, error))
+
+        threading.Thread(target=choose, daemon=True).start()
+        self.after(POLL_MS, self.poll_search, search)
+
+    def poll_search(self, search: int):
+        """play the computer's move if it has been chosen, otherwise check
+        again shortly
+
+        search: the number of the search to wait for
+        """
+        # stop checking once the search has been stopped
+        if search != self.search or not self.searching:
+            return
+        while True:
+            try:
+                finished, move = self.moves.get_nowait()
+            except queue.Empty:
+                self.after(POLL_MS, self.poll_search, search)
+                return
+            # moves from searches that were stopped are thrown away
+            if finished == search:
+                break
+        self.searching = False
+        if isinstance(move, Exception):
+            self.message.config(
+                text="The computer could not move: " + str(move)
+            )
+            return
+        r, c = move
+
+        # play the move
+        self.opponent_turn(r, c)
+        # if computer not won, then change the player to player 1
+        if not self.win_message(r, c):
+            self.game.current_player = 1
+            # update the board
+            self.update_board(r, c, "Your turn!")
+
+    def stop_search(self):
+        """stop the computer choosing a move, and ignore its choice"""
+        if self.searching:
+            self.game.opponent.cancel()
+            self.searching = False
 
     def player_turn(self, r: int, c: int):
         """player turn
@@ -146,17 +358,14 @@ class TicTacToeWindow(tk.Tk):
         # place the counter on the square picked
         self.game.place(self.game.current_player, r, c)
 
-    def opponent_turn(self) -> tuple[int]:
-        """computer determines its move, and plays it
+    def opponent_turn(self, r: int, c: int):
+        """play the move the computer chose
 
-        returns: the row and column that the opponent played
+        r: the row it picked
+        c: the column it picked
         """
-        # computer determines the move it is going to make
-        r, c = self.game.opponent.choose_move(self.game)
         # place the counter on the square picked
         self.game.place(self.game.current_player, r, c)
-        # return the move picked
-        return r, c
 
     def win_message(self, r: int, c: int) -> bool:
         """check for a win, and display appropriate message
@@ -181,49 +390,55 @@ class TicTacToeWindow(tk.Tk):
         return False
 
     def cancel(self):
-        """stops the whole program"""
+        """makes the computer move now if it is thinking, otherwise stops
+        the whole program"""
+        if self.searching:
+            # the search stops early and hands back its best move so far
+            self.game.opponent.cancel()
+            return
         exit()
 
 
 class TicTacToeWindowIn2D(tk.Tk):
     """class defining the window that the main_game will play in"""
 
-    def __init__(self):
-        """initialiser - subclass of Tk"""
+    def __init__(self, bot: bool = False):
+        """initialiser - subclass of Tk
+
+        bot: whether player X is played by the computer
+        """
         super().__init__()
 
         # The main title for the window
         self.title("Tic Tac Toe")
 
+        # The computer opponent, if there is one
+        self.opponent = MCTSBot() if bot else None
+
+        # create the gameboard display, which is kept for every game
+        self.create_gameboard_widget("Player O: Click a square to begin.")
+
         # Reset the board
         self.reset()
 
     def reset(self):
         """recreate the key pieces of information for the game"""
 
-        # initialise the games
-        self.main_game = Game()
-        self.games = [[Game() for i in range(3)] for _ in range(3)]
-
-        # determine where the next move must be - -1 indicates any square
-        self.nextrow = -1
-        self.nextcolumn = -1
+        # initialise the game - the rules and state all live in the engine,
+        # and the window only displays them
+        self.engine = UltimateGame()
 
-        # create a tracker for the last counter placed & the next allowed move
-        self.lastlabel = None
-        self.nextboard = None
-
-        # initialise an array of labels for the 9 games, each with 9 squares
-        grid_labels = [[0 for i in range(3)] for _ in range(3)]
-        self.labels = [
-            [deepcopy(grid_labels) for i in range(3)] for _ in range(3)
-        ]
+        # create a tracker for the square of the last counter placed
+        self.lastsquare = None
 
-        # initialise the gameboards
-        self.gameboards = [[0] * 3 for _ in range(3)]
+        # empty the board that is already drawn
+        self.gameboard.clear()
+        self.message.config(text="Player O: Click a square to begin.")
 
-        # create the gameboard display
-        self.create_gameboard_widget("Player O: Click a square to begin.")
+    def counter(self, game_r: int, game_c: int, r: int, c: int) -> str:
+        """the counter to display in square r, c of the game in game_r,
+        game_c"""
+        return COUNTERS[self.engine.cell(game_r * 3 + game_c, r * 3 + c)]
 
     def create_gameboard_widget(self, status: str):
         """initialise the main_game board graphics
@@ -231,80 +446,12 @@ class TicTacToeWindowIn2D(tk.Tk):
         status: the text to display on the main screen
         """
 
-        # reset the board
-        try:
-            # remove previous main_game boards if possible
-            self.main_gameboard.destroy()
-            self.message.destroy()
-            self.button_reset.destroy()
-            self.button_quit.destroy()
-        except Exception:
-            pass
-
-        # add the main_game board outline
-        self.main_gameboard = tk.Frame(
-            height=297, width=297, bd=3, relief=tk.RIDGE
+        # add the main_game board, with the 81 squares of the 9 games drawn
+        # on a single canvas
+        self.gameboard = BoardCanvas(
+            self, 9, 33, 12, block=3, on_click=self.on_mouse_down
         )
-        self.main_gameboard.pack(padx=20, pady=20)
-
-        # loop through each row of the large board
-        for game_r in range(3):
-            # set the large board rowheight
-            self.main_gameboard.rowconfigure(game_r, minsize=99)
-            # loop through each column of the large board
-            for game_c in range(3):
-                # set the large board column width
-                self.main_gameboard.columnconfigure(game_c, minsize=99)
-
-                # add the frame for the individual board
-                self.gameboards[game_r][game_c] = tk.Frame(
-                    self.main_gameboard,
-                    height=99,
-                    width=99,
-                    bd=2,
-                    relief=tk.RIDGE,
-                )
-                # expand the frame to fit the grid
-                self.gameboards[game_r][game_c].grid(
-                    sticky=tk.E + tk.W + tk.N + tk.S, row=game_r, column=game_c
-                )
-
-                # add the labels in the individual board
-                for r in range(3):
-                    # set the rowheight for the individual board
-                    self.gameboards[game_r][game_c].rowconfigure(r, minsize=33)
-                    for c in range(3):
-                        # set the column width for the individual board
-                        self.gameboards[game_r][game_c].columnconfigure(
-                            c, minsize=33
-                        )
-                        # create a label with the correct counter icon
-                        # displayed on it
-                        label = tk.Label(
-                            self.gameboards[game_r][game_c],
-                            font=("Courier", 12, "bold"),
-                            bd=1,
-                            relief=tk.RIDGE,
-                            text=self.games[game_r][game_c].counters[
-                                self.games[game_r][game_c].board[r][c]
-                            ],
-                        )
-                        # expand the label to fit the grid
-                        label.grid(
-                            sticky=tk.E + tk.W + tk.N + tk.S, row=r, column=c
-                        )
-                        # add a click event to the label
-                        label.bind(
-                            "<Button-1>",
-                            lambda event, arg={
-                                "row": r,
-                                "column": c,
-                                "game_row": game_r,
-                                "game_column": game_c,
-                            }: self.on_mouse_down(event, arg),
-                        )
-                        # add the label to the graphic list of labels
-                        self.labels[game_r][game_c][r][c] = label
+        self.gameboard.pack(padx=20, pady=20)
 
         # add the status label
         self.message = tk.Label(text=status)
@@ -319,75 +466,72 @@ class TicTacToeWindowIn2D(tk.Tk):
         self.button_quit.pack(padx=20, pady=20, fill=tk.X)
 
     def update_board(self, game_r, game_c, r, c, status):
-        """replace the counter in the label in position r,c in the grid
+        """replace the counter in position r,c in the grid
         in position game_r, game_c of the main board
         and update the message label to read status"""
 
-        # update label (if it still exists)
-        try:
-            self.labels[game_r][game_c][r][c].config(
-                text=self.games[game_r][game_c].counters[
-                    self.games[game_r][game_c].board[r][c]
-                ]
-            )
-        except Exception:
-            pass
+        # update the square
+        self.gameboard.draw_counter(
+            game_r * 3 + r, game_c * 3 + c, self.counter(game_r, game_c, r, c)
+        )
         # update status message
         self.message.config(text=status)
 
     def update_main(self, game_r: int, game_c: int, status: str):
-        """replaces the gameboard in game_r, game_c with an icon displaying
+        """covers the game in game_r, game_c with an icon displaying
         which player won that square and updates the message label to read
         status
 
-        game_r: the row of the game to replace
-        game_c: the column of the game to replace
+        game_r: the row of the game to cover
+        game_c: the column of the game to cover
         status: the text to display in the message
         """
 
-        # destroy grid of labels currently in that position
-        self.gameboards[game_r][game_c].destroy()
-        # add label displaying winning counter
-        self.gameboards[game_r][game_c] = tk.Label(
-            self.main_gameboard,
-            font=("Courier", 48, "bold"),
-            text=self.main_game.counters[self.main_game.board[game_r][game_c]],
-            bd=2,
-            relief=tk.RIDGE,
-        )
-        # expand label to fill grid
-        self.gameboards[game_r][game_c].grid(
-            sticky=tk.E + tk.W + tk.N + tk.S, row=game_r, column=game_c
+        # cover the game with the winning counter
+        self.gameboard.cover(
+            game_r,
+            game_c,
+            COUNTERS[self.engine.winner_of(game_r * 3 + game_c)],
         )
 
         # update message
         self.message.config(text=status)
 
-    def on_mouse_down(self, _, arg: dict):
-        """event handler for clicking the labels"""
-
-        # check whether the main game has been completed or not
-        if not self.main_game.complete:
-            # extract the grid position from the arguments
-            game_r = arg["game_row"]
-            game_c = arg["game_column"]
-
-            # check if move is in next allowed square
-            if self.nextrow == -1 or (
-                self.nextrow == game_r and self.nextcolumn == game_c
-            ):
-                # extract the specific cell clicked by the user
-                r = arg["row"]
-                c = arg["column"]
-                # check if that is a position with a counter in
-                if self.games[game_r][game_c].board[r][c] == 0:
-                    # place the new counter in position r, c of grid in
-                    # game_r, game_c
-                    self.play_game(game_r, game_c, r, c)
+    def show_playable(self):
+        """shade the squares of the games the next move can be made in"""
+        games = self.engine.playable_games()
+        for row in range(9):
+            for column in range(9):
+                game = row // 3 * 3 + column // 3
+                self.gameboard.draw_background(
+                    row, column, HIGHLIGHT if games >> game & 1 else "white"
+                )
+
+    def on_mouse_down(self, row: int, column: int):
+        """event handler for clicking the squares
+
+        row: the row of the square clicked on the whole board
+        column: the column of the square clicked on the whole board
+        """
+
+        # split the position into the game and the square within it
+        game_r, r = divmod(row, 3)
+        game_c, c = divmod(column, 3)
+
+        # check it is a person's turn to play
+        if self.opponent is not None and self.engine.player == 2:
+            return
+
+        # check the game is still going, the move is in the next allowed
+        # game and that square is empty
+        if self.engine.is_legal(9 * (game_r * 3 + game_c) + r * 3 + c):
+            # place the new counter in position r, c of grid in
+            # game_r, game_c
+            self.play_game(game_r, game_c, r, c)
 
     def play_game(self, game_r: int, game_c: int, r: int, c: int):
-        """simulates a move. r and c will refer to the grid reference of the label
-        they will have clicked in the game in grid game_r, game_c
+        """simulates a move. r and c will refer to the grid reference of the
+        square they will have clicked in the game in grid game_r, game_c
 
         game_r: the row of the mini game currently being played
         game_c: the column of the mini game currently being played
@@ -395,62 +539,43 @@ class TicTacToeWindowIn2D(tk.Tk):
         c: the column within the mini game to play the move in
         """
 
-        # change the colour of the previously selected label to black
-        # (if possible)
-        try:
-            self.lastlabel.config(fg="black")
-        except Exception:
-            pass
-        # change the colour of the previously allowed game to white
-        # (if possible)
-        try:
-            self.nextboard.config(bg="white")
-        except Exception:
-            pass
+        # change the colour of the previously placed counter to black
+        if self.lastsquare is not None:
+            self.gameboard.draw_counter(*self.lastsquare, colour="black")
+        # the player making this move
+        player = self.engine.player
         # simulate the player move in game game_r, game_c, position r, c
         self.player_turn(game_r, game_c, r, c)
-        # update the label last selected
-        self.lastlabel = self.labels[game_r][game_c][r][c]
-        # change the label that was last selected to green
-        self.lastlabel.config(fg="green")
+        # show the counter just placed in green
+        self.lastsquare = (game_r * 3 + r, game_c * 3 + c)
+        self.gameboard.draw_counter(
+            *self.lastsquare, self.counter(game_r, game_c, r, c), "green"
+        )
 
         # check if that specific game has now finished or not
-        self.win_message(game_r, game_c, r, c)
-
-        # check if the game in grid position r, c is finished
-        if self.games[r][c].complete:
-            # if it is, then allow the next player to play any move
-            self.nextrow = -1
-            self.nextcolumn = -1
-        else:
-            # if not, then restrict them to play in the game in r, c
-            self.nextrow = r
-            self.nextcolumn = c
+        self.win_message(game_r, game_c, r, c, player)
+
+        # shade the games that can be played in next, if any
+        self.show_playable()
 
         # check for win of main game
-        if not self.win_game(game_r, game_c):
-            # if player not won, then change the player number
-            self.main_game.current_player = (
-                self.main_game.current_player
-            ) % 2 + 1
+        if not self.win_game(game_r, game_c, player):
+            # the engine has already passed the turn to the next player
+            counter = COUNTERS[self.engine.player]
+            forced = self.engine.forced
 
             # update the board
-            if self.nextrow == -1:
+            if forced == -1:
                 # if they are allowed to play anywhere, then let them know
                 self.update_board(
                     game_r,
                     game_c,
                     r,
                     c,
-                    "Player {0}: Play anywhere!".format(
-                        self.main_game.counters[self.main_game.current_player]
-                    ),
+                    "Player {0}: Play anywhere!".format(counter),
                 )
-                # indicate that they could play in the whole grid
-                self.nextboard = self.main_gameboard
-                # change the background to red of the entire gameboard
-                self.nextboard.config(bg="red")
             else:
+                nextrow, nextcolumn = divmod(forced, 3)
                 # let them know where they need to play
                 self.update_board(
                     game_r,
@@ -458,15 +583,23 @@ class TicTacToeWindowIn2D(tk.Tk):
                     r,
                     c,
                     "Player {0}: Play in square {1}, {2}".format(
-                        self.main_game.counters[self.main_game.current_player],
-                        self.nextrow + 1,
-                        self.nextcolumn + 1,
+                        counter, nextrow + 1, nextcolumn + 1
                     ),
                 )
-                # indicate which game they have to play
-                self.nextboard = self.gameboards[self.nextrow][self.nextcolumn]
-                # change the background to red of that game
-                self.nextboard.config(bg="red")
+
+            # let the computer reply, once the display has caught up
+            if self.opponent is not None and self.engine.player == 2:
+                self.message.config(text="Waiting...")
+                self.after(1, self.opponent_turn)
+
+    def opponent_turn(self):
+        """computer determines its move, and plays it"""
+        # the game may have been reset since the move was asked for
+        if self.engine.player != 2 or self.engine.result:
+            return
+        move = self.opponent.choose_move(self.engine)
+        game, square = divmod(move, 9)
+        self.play_game(*divmod(game, 3), *divmod(square, 3))
 
     def player_turn(self, game_r: int, game_c: int, r: int, c: int):
         """player turn
@@ -478,86 +611,70 @@ class TicTacToeWindowIn2D(tk.Tk):
         """
 
         # place the player's counter on grid r, c of game in game_r, game_c
-        self.games[game_r][game_c].place(self.main_game.current_player, r, c)
+        self.engine.make(9 * (game_r * 3 + game_c) + r * 3 + c)
 
-    def win_message(self, game_r: int, game_c: int, r: int, c: int) -> bool:
+    def win_message(
+        self, game_r: int, game_c: int, r: int, c: int, player: int
+    ) -> bool:
         """check for a win of a small game, and display appropriate message
 
         game_r: the row of the mini game currently being played
         game_c: the column of the mini game currently being played
         r: the row within the mini game to play the move in
         c: the column within the mini game to play the move in
+        player: the player who made the move
         returns: True if the mini game played in game_r, game_c has been
         completed, False otherwise
         """
 
-        # check if the game is in a finished position
-        win_state = self.games[game_r][game_c].check_for_win()
-        if win_state:
-            # check for a draw
-            if win_state == -1:
-                # update message and board
-                self.update_board(game_r, game_c, r, c, "That was a draw...")
-                # reset the current board to be empty
-                self.games[game_r][game_c] = Game()
-                for r in range(3):
-                    for c in range(3):
-                        self.update_board(
-                            game_r, game_c, r, c, "That was a draw..."
-                        )
+        _, _, cleared, won = self.engine.history[-1]
+        # check for a draw - the engine has already cleared the game
+        if cleared is not None:
+            for r in range(3):
+                for c in range(3):
+                    self.update_board(
+                        game_r, game_c, r, c, "That was a draw..."
+                    )
+            return True
 
-            # otherwise it is a win
+        # otherwise check for a win
+        if won:
+            if self.engine.forced == -1:
+                self.update_main(game_r, game_c, "Play anywhere")
             else:
-                # update game to show complete
-                self.games[game_r][game_c].complete = True
-                # update the main game
-                self.main_game.board[game_r][
-                    game_c
-                ] = self.main_game.current_player
-                if self.games[self.nextrow][self.nextcolumn].complete:
-                    self.nextrow = -1
-                    self.nextcolumn = -1
-                    self.update_main(game_r, game_c, "Play anywhere")
-                else:
-                    self.update_main(
-                        game_r,
-                        game_c,
-                        "Play in square {0}, {1}".format(
-                            self.nextrow + 1, self.nextcolumn + 1
-                        ),
-                    )
+                nextrow, nextcolumn = divmod(self.engine.forced, 3)
+                self.update_main(
+                    game_r,
+                    game_c,
+                    "Play in square {0}, {1}".format(
+                        nextrow + 1, nextcolumn + 1
+                    ),
+                )
             return True
         return False
 
-    def win_game(self, game_r: int, game_c: int) -> bool:
+    def win_game(self, game_r: int, game_c: int, player: int) -> bool:
         """checks for win of large game following an update in game
         in game_r, game_c
 
         game_r: the row of the mini-game just finished
         game_c: the column of the mini-game just finished
+        player: the player who made the last move
         returns: True if the main game has completed, False otherwise
         """
 
         # check if game in finished position
-        win_state = self.main_game.check_for_win()
+        win_state = self.engine.result
         if win_state:
-            # mark game as completed
-            self.main_game.complete = True
             # check for draw
             if win_state == -1:
                 # update display and display message saying a draw
-                self.update_main(game_r, game_c, "It's a draw...")
+                self.message.config(text="It's a draw...")
             # otherwise its a win
             else:
                 # update display and display message saying a win
-                self.update_main(
-                    game_r,
-                    game_c,
-                    "Player "
-                    + str(
-                        self.main_game.counters[self.main_game.current_player]
-                    )
-                    + " won the game!",
+                self.message.config(
+                    text="Player " + str(COUNTERS[player]) + " won the game!",
                 )
             return True
         return False
@@ -1,3 +1,19 @@
+from .bitboard import BitBoard, win_masks
+from .board import Board
+from .lines import LineTracker
+from .ordering import MoveOrderer
+from .stats import SearchStats
 from .supporting_functions import check_for_win, get_player_move
+from .transposition import TranspositionTable
 
-__all__ = ["check_for_win", "get_player_move"]
+__all__ = [
+    "BitBoard",
+    "Board",
+    "LineTracker",
+    "MoveOrderer",
+    "SearchStats",
+    "TranspositionTable",
+    "check_for_win",
+    "get_player_move",
+    "win_masks",
+]
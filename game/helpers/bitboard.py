@@ -0,0 +1,235 @@
+from functools import lru_cache
+from typing import Iterator, Optional, Sequence, Union
+
+__all__ = [
+    "BitBoard",
+    "board_state",
+    "dead_draw",
+    "full_mask",
+    "iter_bits",
+    "masks_from_rows",
+    "popcount",
+    "win_masks",
+]
+
+
+@lru_cache(maxsize=None)
+def win_masks(size: int, k: Optional[int] = None) -> tuple[int, ...]:
+    """build the bit masks of every winning line on a size x size board
+
+    Square (i, j) is stored in bit i * size + j. The lines are returned in
+    the same order the list based checker used to build them: the columns,
+    then the rows, then the two diagonals. When k is less than the size,
+    every run of k squares along each of those counts as a line.
+
+    size: the number of rows and columns on the board
+    k: the number of counters in a row needed to win, None for the size
+    returns: a tuple of integer masks, one per line
+    """
+    if k is None:
+        k = size
+    starts = range(size - k + 1)
+    masks = []
+    # columns
+    for j in range(size):
+        for i in starts:
+            masks.append(sum(1 << ((i + t) * size + j) for t in range(k)))
+    # rows
+    for i in range(size):
+        for j in starts:
+            masks.append(sum(1 << (i * size + j + t) for t in range(k)))
+    # leading diagonals
+    for i in starts:
+        for j in starts:
+            masks.append(sum(1 << ((i + t) * size + j + t) for t in range(k)))
+    # anti-diagonals
+    for i in starts:
+        for j in starts:
+            masks.append(
+                sum(1 << ((i + k - 1 - t) * size + j + t) for t in range(k))
+            )
+    return tuple(masks)
+
+
+@lru_cache(maxsize=None)
+def full_mask(size: int) -> int:
+    """the mask with a bit set for every square on the board"""
+    return (1 << (size * size)) - 1
+
+
+def iter_bits(mask: int) -> Iterator[int]:
+    """yield the index of every set bit in mask, lowest first"""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def popcount(mask: int) -> int:
+    """the number of set bits in mask - int.bit_count needs Python 3.10"""
+    return bin(mask).count("1")
+
+
+def dead_draw(
+    player_1: int, player_2: int, size: int, k: Optional[int] = None
+) -> bool:
+    """whether neither player can complete any line, because every line
+    already holds counters of both players"""
+    for mask in win_masks(size, k):
+        if not (player_1 & mask and player_2 & mask):
+            return False
+    return True
+
+
+def board_state(
+    player_1: int,
+    player_2: int,
+    size: int,
+    early_draw: bool = False,
+    k: Optional[int] = None,
+) -> int:
+    """find the state of the board held in the two player masks
+
+    early_draw: report a draw as soon as no line can be completed, rather
+    than waiting for the board to fill
+    k: the number of counters in a row needed to win, None for the size
+
+    returns:
+    0: game not over
+    -1: game ended with a draw
+    1: Player 1 won
+    2: Player 2 won"""
+    for mask in win_masks(size, k):
+        if player_1 & mask == mask:
+            return 1
+        if player_2 & mask == mask:
+            return 2
+    if player_1 | player_2 == full_mask(size):
+        return -1
+    if early_draw and dead_draw(player_1, player_2, size, k):
+        return -1
+    return 0
+
+
+def masks_from_rows(rows: Sequence[Sequence[int]]) -> list[int]:
+    """convert a list based board into the masks used by BitBoard
+
+    rows: a 'square' board grid of locations
+    returns: the list [0, player 1 mask, player 2 mask]
+    """
+    size = len(rows)
+    masks = [0, 0, 0]
+    for i in range(size):
+        row = rows[i]
+        for j in range(size):
+            player = row[j]
+            if player:
+                masks[player] |= 1 << (i * size + j)
+    return masks
+
+
+class BitBoard:
+    """a square board held as one integer mask per player
+
+    The masks are kept in a list indexed by player number, so
+    masks[1] and masks[2] hold the squares of players 1 and 2. Index 0 is
+    unused, but keeps lookups by player number free of arithmetic.
+    """
+
+    __slots__ = ("size", "masks")
+
+    def __init__(self, size: int = 3, masks: Optional[list[int]] = None):
+        """create a new board
+
+        size: the number of rows and columns on the board
+        masks: the player masks to start from, [0, player 1, player 2]
+        """
+        self.size = size
+        self.masks = [0, 0, 0] if masks is None else list(masks)
+
+    @classmethod
+    def from_rows(cls, rows: Sequence[Sequence[int]]) -> "BitBoard":
+        """create a board from a list based board"""
+        if isinstance(rows, BitBoard):
+            return cls(rows.size, rows.masks)
+        return cls(len(rows), masks_from_rows(rows))
+
+    def copy(self) -> "BitBoard":
+        """an independent copy of the board"""
+        return BitBoard(self.size, self.masks)
+
+    def get(self, i: int, j: int) -> int:
+        """the player with a counter on square (i, j), or 0 if it is empty"""
+        bit = 1 << (i * self.size + j)
+        if self.masks[1] & bit:
+            return 1
+        if self.masks[2] & bit:
+            return 2
+        return 0
+
+    def set(self, i: int, j: int, player: int):
+        """put player's counter on square (i, j), 0 clears the square"""
+        bit = 1 << (i * self.size + j)
+        masks = self.masks
+        masks[1] &= ~bit
+        masks[2] &= ~bit
+        if player:
+            masks[player] |= bit
+
+    def empty(self) -> int:
+        """the mask of squares without a counter on them"""
+        return full_mask(self.size) & ~(self.masks[1] | self.masks[2])
+
+    def empty_squares(self) -> Iterator[int]:
+        """yield the index of each empty square in row-major order"""
+        return iter_bits(self.empty())
+
+    def state(self, early_draw: bool = False) -> int:
+        """the win state of the board, as returned by check_for_win"""
+        return board_state(self.masks[1], self.masks[2], self.size, early_draw)
+
+    def rows(self) -> list[list[int]]:
+        """a list based copy of the board"""
+        return [
+            [self.get(i, j) for j in range(self.size)]
+            for i in range(self.size)
+        ]
+
+
+class _RowView:
+    """a single row of a list-like board, such as Board"""
+
+    __slots__ = ("bitboard", "row")
+
+    def __init__(self, bitboard: BitBoard, row: int):
+        self.bitboard = bitboard
+        self.row = row
+
+    def __len__(self) -> int:
+        return self.bitboard.size
+
+    def __getitem__(self, column: Union[int, slice]):
+        if isinstance(column, slice):
+            return list(self)[column]
+        if column < 0:
+            column += self.bitboard.size
+        if not 0 <= column < self.bitboard.size:
+            raise IndexError("board column out of range")
+        return self.bitboard.get(self.row, column)
+
+    def __setitem__(self, column: int, player: int):
+        if column < 0:
+            column += self.bitboard.size
+        if not 0 <= column < self.bitboard.size:
+            raise IndexError("board column out of range")
+        self.bitboard.set(self.row, column, player)
+
+    def __iter__(self) -> Iterator[int]:
+        for column in range(self.bitboard.size):
+            yield self.bitboard.get(self.row, column)
+
+    def __eq__(self, other) -> bool:
+        return list(self) == list(other)
+
+    def __repr__(self) -> str:
+        return repr(list(self))
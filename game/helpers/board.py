@@ -0,0 +1,253 @@
+from array import array
+from typing import Iterator, Optional, Sequence, Union
+
+from .bitboard import BitBoard, _RowView, board_state, win_masks
+from .lines import lines_through
+from .zobrist import move_keys, symmetric_move_keys, zobrist_hash, zobrist_keys
+
+__all__ = ["Board"]
+
+
+class Board(BitBoard):
+    """a square board that moves can be made on and taken back
+
+    Alongside the player masks of BitBoard, each square's counter is held
+    in a flat bytearray for quick lookups, and the empty squares are kept
+    in a list that is updated as moves are made rather than rebuilt. The
+    board can be read and written as board[i][j], like a list of lists.
+
+    The Zobrist key of the position is kept in zobrist, and changed with
+    a single XOR on each move, so positions can be cached by it. Keys of
+    the board's 8 rotations and reflections can be kept too, to treat
+    symmetric positions as one.
+    """
+
+    __slots__ = (
+        "k",
+        "cells",
+        "empties",
+        "where",
+        "history",
+        "zobrist",
+        "symmetric",
+        "_moves",
+    )
+
+    def __init__(
+        self,
+        size: int = 3,
+        masks: Optional[list[int]] = None,
+        k: Optional[int] = None,
+        symmetric: bool = False,
+    ):
+        """create a new board
+
+        size: the number of rows and columns on the board
+        masks: the player masks to start from, [0, player 1, player 2]
+        k: the number of counters in a row needed to win, None for the size
+        symmetric: keep the keys of the rotations and reflections of the
+        board up to date as well, for canonical_key
+        """
+        super().__init__(size, masks)
+        if k is None:
+            k = size
+        elif not 1 <= k <= size:
+            raise ValueError("Invalid k - must be between 1 and the size")
+        self.k = k
+        masks = self.masks
+        squares = size * size
+        # The player on each square, or 0, indexed by i * size + j
+        self.cells = bytearray(squares)
+        for square in range(squares):
+            if masks[1] >> square & 1:
+                self.cells[square] = 1
+            elif masks[2] >> square & 1:
+                self.cells[square] = 2
+        # The empty squares, in no particular order once moves have been
+        # made, and the position of each one in the list, so a square can
+        # be taken out by swapping it with the last
+        self.empties = [s for s in range(squares) if not self.cells[s]]
+        self.where = array("H", bytes(2 * squares))
+        for index, square in enumerate(self.empties):
+            self.where[square] = index
+        # The squares played by make, so unmake can take them back
+        self.history = []
+
+        # The position's key, and the keys of its 8 symmetric boards if
+        # they are kept
+        self._moves = move_keys(size)
+        self.zobrist = zobrist_hash(masks, size)
+        self.symmetric = (
+            [zobrist_hash(masks, size, symmetry) for symmetry in range(8)]
+            if symmetric
+            else None
+        )
+
+    @classmethod
+    def from_rows(
+        cls, rows: Sequence[Sequence[int]], k: Optional[int] = None
+    ) -> "Board":
+        """create a board from a list based board
+
+        k: the number of counters in a row needed to win, by default that
+        of rows if it is a Board, otherwise the size
+        """
+        board = super().from_rows(rows)
+        if k is None and isinstance(rows, Board):
+            k = rows.k
+        if k is not None and k != board.k:
+            board = cls(board.size, board.masks, k)
+        return board
+
+    def copy(self) -> "Board":
+        """an independent copy of the board, without its move history"""
+        return Board(self.size, self.masks, self.k, self.symmetric is not None)
+
+    def get(self, i: int, j: int) -> int:
+        """the player with a counter on square (i, j), or 0 if it is empty"""
+        return self.cells[i * self.size + j]
+
+    def set(self, i: int, j: int, player: int):
+        """put player's counter on square (i, j), 0 clears the square
+
+        Unlike make, this is not recorded in the history.
+        """
+        square = i * self.size + j
+        old = self.cells[square]
+        if old == player:
+            return
+        if old:
+            self.masks[old] ^= 1 << square
+        if player:
+            self.masks[player] |= 1 << square
+        # The square only joins or leaves the empty list if it was, or will
+        # be, empty
+        if not old:
+            self._remove_empty(square)
+        elif not player:
+            self._add_empty(square)
+        self.cells[square] = player
+        # Only a counter added or taken away changes the side to move
+        keys, side = zobrist_keys(self.size)
+        change = keys[old][square] ^ keys[player][square]
+        if not old or not player:
+            change ^= side
+        self.zobrist ^= change
+        if self.symmetric is not None:
+            self.symmetric = [
+                zobrist_hash(self.masks, self.size, symmetry)
+                for symmetry in range(8)
+            ]
+
+    def make(self, square: int, player: int):
+        """put player's counter on an empty square
+
+        square: the square, numbered i * size + j
+        player: the player to place a counter for
+        """
+        self.masks[player] |= 1 << square
+        self.cells[square] = player
+        self._remove_empty(square)
+        self.history.append(square)
+        self.zobrist ^= self._moves[player][square]
+        if self.symmetric is not None:
+            self._update_symmetric(player, square)
+
+    def unmake(self) -> int:
+        """take back the last move made
+
+        returns: the square the move was made on
+        """
+        square = self.history.pop()
+        player = self.cells[square]
+        self.masks[player] ^= 1 << square
+        self.cells[square] = 0
+        self._add_empty(square)
+        self.zobrist ^= self._moves[player][square]
+        if self.symmetric is not None:
+            self._update_symmetric(player, square)
+        return square
+
+    def _update_symmetric(self, player: int, square: int):
+        """add or take away a counter in the keys of the symmetric boards"""
+        changes = symmetric_move_keys(self.size)[player][square]
+        keys = self.symmetric
+        for symmetry in range(8):
+            keys[symmetry] ^= changes[symmetry]
+
+    def _remove_empty(self, square: int):
+        """take a square out of the empty list, moving the last one into
+        its place"""
+        empties = self.empties
+        last = empties.pop()
+        if last != square:
+            index = self.where[square]
+            empties[index] = last
+            self.where[last] = index
+
+    def _add_empty(self, square: int):
+        """put a square back at the end of the empty list"""
+        self.where[square] = len(self.empties)
+        self.empties.append(square)
+
+    def state(self, early_draw: bool = False) -> int:
+        """the win state of the board, as returned by check_for_win"""
+        return board_state(
+            self.masks[1], self.masks[2], self.size, early_draw, self.k
+        )
+
+    def move_state(self, square: int) -> int:
+        """the win state of the board, looking only at the lines through
+        the counter on square
+
+        Only the player who just moved can have made a new line, so after
+        each move in a game that was still in play this gives the same
+        answer as state(), without looking at the rest of the board.
+
+        square: the square the last move was made on
+        """
+        player = self.cells[square]
+        mine = self.masks[player]
+        lines = win_masks(self.size, self.k)
+        for line in lines_through(self.size, self.k)[square]:
+            mask = lines[line]
+            if mine & mask == mask:
+                return player
+        return 0 if self.empties else -1
+
+    def canonical_key(self) -> int:
+        """the Zobrist key shared by the board and all its rotations and
+        reflections - the smallest of their keys"""
+        if self.symmetric is not None:
+            return min(self.symmetric)
+        return min(
+            zobrist_hash(self.masks, self.size, symmetry)
+            for symmetry in range(8)
+        )
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __getitem__(self, row: Union[int, slice]):
+        if isinstance(row, slice):
+            return list(self)[row]
+        if row < 0:
+            row += self.size
+        if not 0 <= row < self.size:
+            raise IndexError("board row out of range")
+        return _RowView(self, row)
+
+    def __iter__(self) -> Iterator[_RowView]:
+        for row in range(self.size):
+            yield _RowView(self, row)
+
+    def __eq__(self, other: Sequence[Sequence[int]]) -> bool:
+        return self.rows() == [list(row) for row in other]
+
+    # Boards change as moves are made, so cannot be used as dict keys -
+    # zobrist, or canonical_key() for all its symmetries, gives a number
+    # for the position that can
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return repr(self.rows())
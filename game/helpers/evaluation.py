@@ -0,0 +1,39 @@
+from functools import lru_cache
+
+from .lines import LineTracker
+
+__all__ = ["WIN_SCORE", "evaluate"]
+
+# The score of a won position - every heuristic score is smaller than this
+WIN_SCORE = 1_000_000_000
+
+
+@lru_cache(maxsize=None)
+def line_weights(k: int) -> tuple[int, ...]:
+    """the value of an open line of k squares, indexed by the number of a
+    player's counters in it
+
+    Each extra counter in a line is worth ten times the last, so one line
+    that is nearly complete outweighs several that have just been started.
+    """
+    return (0,) + tuple(10 ** (count - 1) for count in range(1, k + 1))
+
+
+def evaluate(lines: LineTracker, player: int) -> int:
+    """estimate how good a position that is still in play is for player
+
+    Only lines that hold counters of a single player can still be won, so
+    each of those counts for the player who holds them.
+
+    lines: the line counts of the position
+    player: the player to score the position for
+    returns: a score between -WIN_SCORE and WIN_SCORE, higher is better
+    """
+    weights = line_weights(lines.k)
+    score = 0
+    for mine, theirs in zip(lines.counts[player], lines.counts[3 - player]):
+        if not theirs:
+            score += weights[mine]
+        elif not mine:
+            score -= weights[theirs]
+    return score
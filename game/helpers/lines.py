@@ -0,0 +1,126 @@
+from functools import lru_cache
+from typing import Optional
+
+from .bitboard import popcount, win_masks
+
+__all__ = ["LineTracker", "lines_through"]
+
+
+@lru_cache(maxsize=None)
+def lines_through(
+    size: int, k: Optional[int] = None
+) -> tuple[tuple[int, ...], ...]:
+    """index the winning lines by the squares they pass through
+
+    size: the number of rows and columns on the board
+    k: the number of counters in a row needed to win, None for the size
+    returns: for each square, the indexes into win_masks(size, k) of the
+    lines that contain it
+    """
+    masks = win_masks(size, k)
+    return tuple(
+        tuple(n for n, mask in enumerate(masks) if mask >> square & 1)
+        for square in range(size * size)
+    )
+
+
+class LineTracker:
+    """incremental win detection for a square board
+
+    Keeps a count of each player's counters in every winning line, which
+    is updated on each place and undo by looking only at the lines through
+    that square. A line stays 'live' while it holds the counters of at most
+    one player. Once no live lines remain neither player can win, so the
+    game is a dead draw even if empty squares are left.
+    """
+
+    __slots__ = (
+        "size",
+        "k",
+        "counts",
+        "live",
+        "filled",
+        "winner",
+        "_through",
+    )
+
+    def __init__(self, size: int = 3, masks=None, k: Optional[int] = None):
+        """create a tracker for a board
+
+        size: the number of rows and columns on the board
+        masks: the player masks of the board, [0, player 1, player 2], if
+        the board is not empty
+        k: the number of counters in a row needed to win, None for the size
+        """
+        self.size = size
+        self.k = size if k is None else k
+        self._through = lines_through(size, self.k)
+        lines = win_masks(size, self.k)
+        if masks is None:
+            masks = [0, 0, 0]
+        # The number of counters each player has in each line
+        self.counts = [
+            None,
+            [popcount(masks[1] & line) for line in lines],
+            [popcount(masks[2] & line) for line in lines],
+        ]
+        # The number of lines that can still be completed
+        self.live = sum(
+            not (ones and twos)
+            for ones, twos in zip(self.counts[1], self.counts[2])
+        )
+        # The number of squares with a counter on
+        self.filled = popcount(masks[1] | masks[2])
+        # The player who has won, if any
+        self.winner = 0
+        for player in (1, 2):
+            if self.k in self.counts[player]:
+                self.winner = player
+                break
+
+    def place(self, player: int, square: int) -> int:
+        """record player's counter being put on square
+
+        returns: the state of the board after the move, as state()
+        """
+        k = self.k
+        mine = self.counts[player]
+        theirs = self.counts[3 - player]
+        for line in self._through[square]:
+            mine[line] += 1
+            count = mine[line]
+            if count == k:
+                self.winner = player
+            # The line dies when the first counter goes in against the
+            # opponent
+            elif count == 1 and theirs[line]:
+                self.live -= 1
+        self.filled += 1
+        return self.state()
+
+    def undo(self, player: int, square: int):
+        """record player's counter being taken back off square"""
+        mine = self.counts[player]
+        theirs = self.counts[3 - player]
+        for line in self._through[square]:
+            if mine[line] == 1 and theirs[line]:
+                self.live += 1
+            mine[line] -= 1
+        self.filled -= 1
+        # The board was still in play before the counter was placed
+        self.winner = 0
+
+    def state(self) -> int:
+        """the state of the board
+
+        returns:
+        0: game not over
+        -1: game is a draw, because the board is full or no line can be
+        completed
+        1: Player 1 won
+        2: Player 2 won"""
+        if self.winner:
+            return self.winner
+        if not self.live or self.filled == self.size * self.size:
+            return -1
+        return 0
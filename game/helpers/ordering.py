@@ -0,0 +1,163 @@
+from functools import lru_cache
+from typing import Iterable, Optional
+
+from .bitboard import iter_bits, win_masks
+from .lines import LineTracker, lines_through
+
+__all__ = ["HEURISTICS", "MoveOrderer", "static_values"]
+
+# The move ordering heuristics that can be switched on
+HEURISTICS = ("hash", "tactics", "killer", "history", "static")
+
+# Killer moves kept for each ply
+KILLERS = 2
+
+
+@lru_cache(maxsize=None)
+def static_values(size: int, k: Optional[int] = None) -> tuple[int, ...]:
+    """a fixed value for each square, before anything has been played
+
+    Squares on more lines are worth more, so on the 3x3 board the centre
+    comes first, then the corners, then the edges. Ties on larger boards go
+    to the square nearest the centre.
+    """
+    through = lines_through(size, k)
+    middle = (size - 1) / 2
+    values = []
+    for square in range(size * size):
+        i, j = divmod(square, size)
+        distance = abs(i - middle) + abs(j - middle)
+        values.append(len(through[square]) * 2 * size - int(distance * 2))
+    return tuple(values)
+
+
+class MoveOrderer:
+    """puts the moves at a node of a search in the order to try them
+
+    The sooner the best move is tried, the more of the others alpha-beta
+    can skip, so moves are tried in this order of preference:
+    hash: the best move found for the position by an earlier search
+    tactics: a move that wins at once, then one that blocks a win
+    killer: a move that caused a cutoff at the same ply elsewhere
+    history: moves that have caused cutoffs often, and in deep searches
+    static: the squares on the most lines
+    Any heuristic left out is skipped. With none at all the moves are tried
+    in row-major order.
+    """
+
+    def __init__(
+        self,
+        size: int,
+        heuristics: Iterable[str] = HEURISTICS,
+        k: Optional[int] = None,
+    ):
+        """create an orderer for a board
+
+        size: the number of rows and columns on the board
+        heuristics: the names of the heuristics to use, from HEURISTICS
+        k: the number of counters in a row needed to win, None for the size
+        """
+        heuristics = tuple(heuristics)
+        for name in heuristics:
+            if name not in HEURISTICS:
+                raise ValueError(
+                    "Invalid heuristic - must be one of "
+                    + ", ".join(HEURISTICS)
+                )
+        self.size = size
+        self.k = size if k is None else k
+        self.heuristics = heuristics
+        self.use_hash = "hash" in heuristics
+        self.use_tactics = "tactics" in heuristics
+        self.use_killers = "killer" in heuristics
+        self.use_history = "history" in heuristics
+        self.static = (
+            static_values(size, self.k)
+            if "static" in heuristics
+            else (0,) * (size * size)
+        )
+        self.lines = win_masks(size, self.k)
+        self.clear()
+
+    def clear(self):
+        """forget the killer moves and history"""
+        # The killer moves at each ply, most recent first
+        self.killers = [[] for _ in range(self.size * self.size + 1)]
+        # How much each player's moves on each square have caused cutoffs
+        self.history = [None, [0] * self.size**2, [0] * self.size**2]
+
+    def age(self):
+        """halve the history, so that recent cutoffs count for more"""
+        for player in (1, 2):
+            self.history[player] = [
+                value // 2 for value in self.history[player]
+            ]
+
+    def order(
+        self,
+        empty: int,
+        lines: LineTracker,
+        player: int,
+        ply: int,
+        hash_move: Optional[int] = None,
+    ) -> list[int]:
+        """the empty squares, best first
+
+        empty: the mask of empty squares
+        lines: the line counts of the position
+        player: the player to move
+        ply: the number of counters on the board
+        hash_move: the square of the best move stored for the position
+        returns: the squares to try, in order
+        """
+        squares = list(iter_bits(empty))
+        if not self.heuristics:
+            return squares
+
+        # Start from the static and history values
+        static = self.static
+        if self.use_history:
+            history = self.history[player]
+            scores = {
+                square: static[square] + 64 * history[square]
+                for square in squares
+            }
+        else:
+            scores = {square: static[square] for square in squares}
+
+        # Boost the killers, then the tactical moves, then the hash move
+        if self.use_killers:
+            for rank, square in enumerate(self.killers[ply]):
+                if square in scores:
+                    scores[square] += 1 << (40 - rank)
+        if self.use_tactics:
+            near = self.k - 1
+            mine = lines.counts[player]
+            theirs = lines.counts[3 - player]
+            for line, mask in enumerate(self.lines):
+                if mine[line] == near and not theirs[line]:
+                    scores[(mask & empty).bit_length() - 1] += 1 << 48
+                elif theirs[line] == near and not mine[line]:
+                    scores[(mask & empty).bit_length() - 1] += 1 << 44
+        if self.use_hash and hash_move in scores:
+            scores[hash_move] += 1 << 52
+
+        squares.sort(key=scores.__getitem__, reverse=True)
+        return squares
+
+    def cutoff(self, player: int, square: int, ply: int, depth: int):
+        """record that player's move on square caused a cutoff
+
+        player: the player who made the move
+        square: the square the move was made on
+        ply: the number of counters on the board before the move
+        depth: how many moves ahead the search below the move looked
+        """
+        if self.use_killers:
+            killers = self.killers[ply]
+            if square in killers:
+                killers.remove(square)
+            killers.insert(0, square)
+            del killers[KILLERS:]
+        if self.use_history:
+            self.history[player][square] += depth * depth
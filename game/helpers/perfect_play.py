@@ -0,0 +1,182 @@
+"""Precomputed perfect play for the 3x3 board
+
+Every position that can be reached in a 3x3 game is solved once, and the
+result is written to a file holding one byte per position. The byte for a
+position is found from its base-3 index, where square n contributes
+3**n times the number of the player with a counter on it, so each board
+has its own slot and the file needs no keys.
+
+Build the file with
+
+    python -m game.helpers.perfect_play
+
+and the bot memory-maps it the first time it is needed. Processes that map
+the same file share one copy of it.
+"""
+
+import mmap
+import sys
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional
+
+from .bitboard import board_state, iter_bits, popcount
+
+__all__ = [
+    "DEFAULT_PATH",
+    "PerfectPlayTable",
+    "board_index",
+    "build_table",
+    "load_table",
+]
+
+# Where the table is written to and read from by default
+DEFAULT_PATH = Path(__file__).parent / "data" / "perfect_3x3.bin"
+
+# The file starts with a marker and the board size
+MAGIC = b"TTT3"
+HEADER = len(MAGIC) + 1
+
+# Each byte holds: bit 7 set for a solved position, bits 4-5 the value for
+# the player to move and bits 0-3 the best square
+SOLVED = 0x80
+NO_MOVE = 0x0F
+VALUES = {0: 0, 1: 1, 2: -1}
+CODES = {0: 0, 1: 1, -1: 2}
+
+
+def board_index(player_1: int, player_2: int) -> int:
+    """the base-3 index of the board held in the two player masks"""
+    index = 0
+    for square in iter_bits(player_1):
+        index += 3**square
+    for square in iter_bits(player_2):
+        index += 2 * 3**square
+    return index
+
+
+def player_to_move(player_1: int, player_2: int) -> int:
+    """the player whose turn it is, when player 1 went first
+
+    returns: 1 or 2, or 0 if the counts of counters are not from a game
+    """
+    difference = popcount(player_1) - popcount(player_2)
+    if difference == 0:
+        return 1
+    if difference == 1:
+        return 2
+    return 0
+
+
+def solve(size: int = 3) -> dict[int, tuple[int, int, int]]:
+    """solve every position reachable from the empty board
+
+    returns: a map from board index to (value, distance, square) for the
+    player to move, where value is 1 for a win, 0 for a draw and -1 for a
+    loss, distance is the number of moves to the end of the game and square
+    is the best move
+    """
+    results = {}
+    full = (1 << (size * size)) - 1
+
+    def negamax(masks: list[int], player: int) -> tuple[int, int]:
+        index = board_index(masks[1], masks[2])
+        if index in results:
+            value, distance, _ = results[index]
+            return value, distance
+
+        best = None
+        best_square = NO_MOVE
+        for square in iter_bits(full & ~(masks[1] | masks[2])):
+            masks[player] |= 1 << square
+            state = board_state(masks[1], masks[2], size)
+            if state == player:
+                value, distance = 1, 1
+            elif state == -1:
+                value, distance = 0, 1
+            else:
+                value, distance = negamax(masks, 3 - player)
+                value, distance = -value, distance + 1
+            masks[player] ^= 1 << square
+            # Win quickly, and lose (or draw) slowly
+            score = (value, -distance if value > 0 else distance)
+            if best is None or score > best:
+                best = score
+                best_square = square
+                result = value, distance
+
+        results[index] = (*result, best_square)
+        return result
+
+    negamax([0, 0, 0], 1)
+    return results
+
+
+def build_table(path: Path = DEFAULT_PATH, size: int = 3) -> int:
+    """solve the board and write the table to path
+
+    returns: the number of positions solved
+    """
+    results = solve(size)
+    table = bytearray(3 ** (size * size))
+    for index, (value, _, square) in results.items():
+        table[index] = SOLVED | CODES[value] << 4 | square
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "wb") as file:
+        file.write(MAGIC + bytes([size]) + table)
+    return len(results)
+
+
+class PerfectPlayTable:
+    """a memory-mapped table of solved positions"""
+
+    def __init__(self, path: Path = DEFAULT_PATH):
+        """map the table at path into memory
+
+        path: the file written by build_table
+        """
+        with open(path, "rb") as file:
+            self.data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.data[: len(MAGIC)] != MAGIC:
+            raise ValueError("Invalid table - " + str(path))
+        self.size = self.data[len(MAGIC)]
+
+    def lookup(self, player_1: int, player_2: int) -> Optional[tuple]:
+        """find the value and best move of a position
+
+        player_1: the mask of player 1's counters
+        player_2: the mask of player 2's counters
+        returns: (player to move, value for that player, best square), or
+        None if the position is not in the table
+        """
+        player = player_to_move(player_1, player_2)
+        if not player:
+            return None
+        entry = self.data[HEADER + board_index(player_1, player_2)]
+        if not entry & SOLVED:
+            return None
+        square = entry & NO_MOVE
+        return (
+            player,
+            VALUES[entry >> 4 & 3],
+            None if square == NO_MOVE else square,
+        )
+
+
+@lru_cache(maxsize=None)
+def load_table(path: Path = DEFAULT_PATH) -> Optional[PerfectPlayTable]:
+    """map the table at path, once per process
+
+    returns: the table, or None if it has not been built
+    """
+    try:
+        return PerfectPlayTable(path)
+    except OSError:
+        return None
+
+
+if __name__ == "__main__":
+    target = Path(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_PATH
+    count = build_table(target)
+    print(f"Solved {count} positions, written to {target}")
@@ -0,0 +1,229 @@
+"""Retrograde analysis of every position on a small board
+
+Rather than searching forward from the empty board, every position is
+solved starting from the full boards and working back one counter at a
+time, so each position's moves lead to positions that have already been
+solved. With NumPy doing the work a whole layer at once, the 3**16 boards
+of 4x4 are solved in seconds.
+
+The result is written to a file of one byte per board, indexed by the
+same base-3 index as the perfect-play table. Each byte holds whether the
+position is solved, its value for the player to move and the number of
+moves left to the end of the game with best play. The best move is not
+stored - it is found by looking up the position after each move.
+
+Build the 4x4 file with
+
+    python -m game.helpers.retrograde
+
+which needs NumPy. The bot memory-maps the file the first time it is
+needed, and looking positions up needs nothing but the file.
+"""
+
+import mmap
+import sys
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional
+
+from .bitboard import iter_bits, win_masks
+from .perfect_play import CODES, SOLVED, VALUES, board_index, player_to_move
+
+__all__ = ["DistanceTable", "build_database", "database_path", "load_database"]
+
+# The file starts with a marker and the board size
+MAGIC = b"TTTD"
+HEADER = len(MAGIC) + 1
+
+# Each byte holds: bit 7 set for a solved position, bits 5-6 the value for
+# the player to move and bits 0-4 the number of moves to the end
+VALUE_SHIFT = 5
+DISTANCE = 0x1F
+
+# Scores that put moves in order of preference - win quickly, and lose (or
+# draw) slowly
+SCALE = 64
+
+
+def database_path(size: int) -> Path:
+    """where the database for a board size is written to and read from"""
+    return Path(__file__).parent / "data" / f"retrograde_{size}x{size}.bin"
+
+
+def _score(value: int, distance: int) -> int:
+    """a score for a result, higher is better for the player to move"""
+    return value * SCALE + (-distance if value > 0 else distance)
+
+
+def solve_layers(size: int = 4) -> bytearray:
+    """solve every position on the board
+
+    returns: one entry per board, by base-3 index
+    """
+    # Imported here, as only building the database needs NumPy
+    import numpy as np
+
+    squares = size * size
+    powers = 3 ** np.arange(squares, dtype=np.int64)
+    lines = [list(iter_bits(mask)) for mask in win_masks(size)]
+
+    # The number of each player's counters on every board, built up one
+    # square at a time, as a board's index is that of the board without
+    # its last square plus 3**square times the counter on it
+    ones = np.zeros(1, dtype=np.uint8)
+    twos = np.zeros(1, dtype=np.uint8)
+    for _ in range(squares):
+        ones = np.concatenate([ones, ones + 1, ones])
+        twos = np.concatenate([twos, twos, twos + 1])
+    # Boards that can come up in a game, where player 1 went first
+    playable = (ones == twos) | (ones == twos + 1)
+    filled = ones + twos
+    del ones, twos
+
+    # The value of each code for the player to move, and the code of each
+    # value from -1 to 1
+    values = np.array([VALUES[code] for code in range(3)], dtype=np.int16)
+    codes = np.array([CODES[value] for value in (-1, 0, 1)], dtype=np.uint8)
+
+    table = np.zeros(3**squares, dtype=np.uint8)
+    for count in range(squares, -1, -1):
+        boards = np.flatnonzero(playable & (filled == count))
+        # The counter on each square of each board
+        cells = np.empty((len(boards), squares), dtype=np.uint8)
+        rest = boards.copy()
+        for square in range(squares):
+            cells[:, square] = rest % 3
+            rest //= 3
+        won = {
+            player: np.any(
+                [np.all(cells[:, line] == player, axis=1) for line in lines],
+                axis=0,
+            )
+            for player in (1, 2)
+        }
+        mover = 1 + count % 2
+        last = 3 - mover
+
+        # The player who just moved has won, unless the player to move had
+        # already won, which cannot come up in a game and is left unsolved
+        lost = won[last] & ~won[mover]
+        table[boards[lost]] = SOLVED | CODES[-1] << VALUE_SHIFT
+        if count == squares:
+            drawn = ~won[1] & ~won[2]
+            table[boards[drawn]] = SOLVED | CODES[0] << VALUE_SHIFT
+            continue
+
+        # Everything else takes the best of its moves, each of which leads
+        # to a board with one more counter that has already been solved
+        playing = ~won[1] & ~won[2]
+        boards, cells = boards[playing], cells[playing]
+        best = np.full(len(boards), -2 * SCALE, dtype=np.int16)
+        for square in range(squares):
+            empty = cells[:, square] == 0
+            entries = table[boards[empty] + mover * powers[square]]
+            value = -values[entries >> VALUE_SHIFT & 3]
+            distance = (entries & DISTANCE).astype(np.int16) + 1
+            score = value * SCALE + np.where(value > 0, -distance, distance)
+            best[empty] = np.maximum(best[empty], score)
+        value = (best + SCALE // 2) // SCALE
+        distance = np.abs(best - value * SCALE)
+        table[boards] = (
+            SOLVED
+            | codes[value + 1] << VALUE_SHIFT
+            | distance.astype(np.uint8)
+        )
+    return bytearray(table.tobytes())
+
+
+def build_database(path: Optional[Path] = None, size: int = 4) -> int:
+    """solve the board and write the database to path
+
+    path: where to write the database, by default database_path(size)
+    returns: the number of positions solved
+    """
+    table = solve_layers(size)
+    path = Path(path or database_path(size))
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "wb") as file:
+        file.write(MAGIC + bytes([size]) + table)
+    # Every solved entry has its top bit set, and the rest are left at 0
+    return len(table) - table.count(0)
+
+
+class DistanceTable:
+    """a memory-mapped database of solved positions"""
+
+    def __init__(self, path: Path):
+        """map the database at path into memory
+
+        path: the file written by build_database
+        """
+        with open(path, "rb") as file:
+            self.data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.data[: len(MAGIC)] != MAGIC:
+            raise ValueError("Invalid database - " + str(path))
+        self.size = self.data[len(MAGIC)]
+        self.powers = [3**square for square in range(self.size**2)]
+
+    def probe(self, player_1: int, player_2: int) -> Optional[tuple]:
+        """find the value of a position
+
+        player_1: the mask of player 1's counters
+        player_2: the mask of player 2's counters
+        returns: (player to move, value for that player, moves to the end of
+        the game), or None if the position cannot come up in a game
+        """
+        player = player_to_move(player_1, player_2)
+        if not player:
+            return None
+        entry = self.data[HEADER + board_index(player_1, player_2)]
+        if not entry & SOLVED:
+            return None
+        return player, VALUES[entry >> VALUE_SHIFT & 3], entry & DISTANCE
+
+    def lookup(self, player_1: int, player_2: int) -> Optional[tuple]:
+        """find the value and best move of a position
+
+        returns: (player to move, value for that player, best square), as
+        PerfectPlayTable.lookup, or None if the position cannot come up in
+        a game
+        """
+        result = self.probe(player_1, player_2)
+        if result is None:
+            return None
+        player, value, distance = result
+        if not distance:
+            return player, value, None
+
+        # The best move leads to the position that is worst for the
+        # opponent
+        index = HEADER + board_index(player_1, player_2)
+        empty = ~(player_1 | player_2) & ((1 << len(self.powers)) - 1)
+        best = best_square = None
+        for square in iter_bits(empty):
+            entry = self.data[index + player * self.powers[square]]
+            score = _score(
+                -VALUES[entry >> VALUE_SHIFT & 3], (entry & DISTANCE) + 1
+            )
+            if best is None or score > best:
+                best, best_square = score, square
+        return player, value, best_square
+
+
+@lru_cache(maxsize=None)
+def load_database(size: int) -> Optional[DistanceTable]:
+    """map the database for a board size, once per process
+
+    returns: the database, or None if it has not been built
+    """
+    try:
+        return DistanceTable(database_path(size))
+    except OSError:
+        return None
+
+
+if __name__ == "__main__":
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    target = Path(sys.argv[2]) if len(sys.argv) > 2 else database_path(size)
+    count = build_database(target, size)
+    print(f"Solved {count} positions, written to {target}")
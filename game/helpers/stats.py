@@ -0,0 +1,127 @@
+"""Statistics on what a search did while choosing a move"""
+
+from typing import Optional
+
+__all__ = ["SearchStats"]
+
+
+class SearchStats:
+    """counts collected by Bot while it chooses one move
+
+    Positions are counted by ply, the number of moves below the position
+    the search started from.
+    """
+
+    __slots__ = (
+        "root_ply",
+        "nodes",
+        "cutoffs",
+        "cutoff_moves",
+        "terminal",
+        "evaluated",
+        "table_hits",
+        "iterations",
+        "seconds",
+        "source",
+    )
+
+    def __init__(self, root_ply: int = 0):
+        """start with nothing counted
+
+        root_ply: the number of counters on the board the search starts from
+        """
+        self.root_ply = root_ply
+        # Positions visited, and beta cutoffs made, at each ply
+        self.nodes = []
+        self.cutoffs = []
+        # How many cutoffs were made by the first, second, ... move tried
+        self.cutoff_moves = []
+        # Positions where the game was over, and positions whose score was
+        # estimated at the depth limit
+        self.terminal = 0
+        self.evaluated = 0
+        # Positions found in the transposition table
+        self.table_hits = 0
+        # The depth, nodes visited and seconds taken by each iteration of
+        # iterative deepening that finished
+        self.iterations = []
+        self.seconds = 0.0
+        # "search", "table" if the move was looked up instead, or "threats"
+        # if it answered a threat
+        self.source = "search"
+
+    def node(self, ply: int, win_state: int):
+        """count a position visited
+
+        ply: the number of counters on the board
+        win_state: the state of the board, as check_for_win
+        """
+        ply -= self.root_ply
+        nodes = self.nodes
+        if ply >= len(nodes):
+            grow = ply + 1 - len(nodes)
+            nodes.extend([0] * grow)
+            self.cutoffs.extend([0] * grow)
+        nodes[ply] += 1
+        if win_state:
+            self.terminal += 1
+
+    def cutoff(self, ply: int, index: int):
+        """count a beta cutoff
+
+        ply: the number of counters on the board
+        index: the position of the move that caused it in the order the
+        moves were tried, from 0
+        """
+        self.cutoffs[ply - self.root_ply] += 1
+        moves = self.cutoff_moves
+        if index >= len(moves):
+            moves.extend([0] * (index + 1 - len(moves)))
+        moves[index] += 1
+
+    def total_nodes(self) -> int:
+        """the number of positions visited"""
+        return sum(self.nodes)
+
+    def branching_factor(self) -> Optional[float]:
+        """the effective branching factor - the number of moves a search of
+        the same depth would try at every position to visit as many
+        positions, or None if nothing below the root was visited"""
+        depth = len(self.nodes) - 1
+        if depth < 1:
+            return None
+        return self.total_nodes() ** (1 / depth)
+
+    def first_move_cutoffs(self) -> Optional[float]:
+        """the fraction of cutoffs made by the first move tried, or None if
+        there were none - the closer to 1, the better the move ordering"""
+        total = sum(self.cutoff_moves)
+        return self.cutoff_moves[0] / total if total else None
+
+    def as_dict(self) -> dict:
+        """every count, for writing out as JSON"""
+        return {
+            "source": self.source,
+            "seconds": self.seconds,
+            "nodes": self.total_nodes(),
+            "nodes_by_ply": self.nodes,
+            "cutoffs_by_ply": self.cutoffs,
+            "cutoff_moves": self.cutoff_moves,
+            "first_move_cutoffs": self.first_move_cutoffs(),
+            "terminal": self.terminal,
+            "evaluated": self.evaluated,
+            "table_hits": self.table_hits,
+            "branching_factor": self.branching_factor(),
+            "iterations": self.iterations,
+        }
+
+    def write(self, path: str, **fields):
+        """append the counts to a file as one line of JSON
+
+        fields: anything else to include, such as the move chosen
+        """
+        # Imported here so that importing the bot does not pull in json
+        import json
+
+        with open(path, "a") as file:
+            file.write(json.dumps({**fields, **self.as_dict()}) + "\n")
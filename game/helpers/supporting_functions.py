@@ -1,45 +1,37 @@
+from .bitboard import BitBoard, board_state, masks_from_rows
+
 __all__ = ["check_for_win", "get_player_move"]
 
 
-def check_for_win(board):
+def check_for_win(board, early_draw=False):
     """checks the board (a 3x3 array) to see whether there are 3 in a row the same
 
+    early_draw: report a draw as soon as neither player can complete a line,
+    instead of only once the board is full. LineTracker gives the same
+    answer incrementally, one move at a time.
+
     returns:
     0: main_game not over
     -1: main_game ended with a draw
     1: Player 1 won
     2: Player 2 won"""
 
-    size = len(board)
-
-    # build triples for all possible rows
-    rows = [[board[i][j] for i in range(size)] for j in range(size)]
-    rows += [[board[i][j] for j in range(size)] for i in range(size)]
-    rows += [[board[i][i] for i in range(size)]]
-    rows += [[board[(size - 1) - i][i] for i in range(size)]]
+    # boards backed by masks can be checked directly
+    if isinstance(board, BitBoard):
+        return board.state(early_draw)
 
-    # check each in turn to see if all are one player's counter
-    for row in rows:
-        for i in (1, 2):
-            if row.count(i) == size:
-                return i
-
-    # if that fails, check if board is full, if yes, draw
-    board_contents = [board[i][j] for i in range(size) for j in range(size)]
-    if 0 not in board_contents:
-        return -1
-
-    # main_game not over yet
-    return 0
+    size = len(board)
+    player_1, player_2 = masks_from_rows(board)[1:]
+    return board_state(player_1, player_2, size, early_draw)
 
 
 def get_player_move(board, player=1):
     """
     Requests an input from the player of a valid move. A valid
     move is one where an integer row and column are provided that
-    are less than 3, and that location on the board is empty.
+    are on the board, and that location on the board is empty.
 
-    board: a 3x3 array
+    board: a square array
     player: The player number (or name)
     returns: Tuple(Int, Int)
     """
@@ -53,8 +45,9 @@ def get_player_move(board, player=1):
     while True:
         try:
             i, j = (int(x) - 1 for x in input().split())
-            if board[i][j] == 0 and i in range(3) and j in range(3):
-                return i, j
+            if i in range(len(board)) and j in range(len(board)):
+                if board[i][j] == 0:
+                    return i, j
             print(
                 "Invalid choice, please try again. Format: " "'row column'\n"
             )
@@ -0,0 +1,81 @@
+from functools import lru_cache
+
+from .bitboard import iter_bits, popcount, win_masks
+
+__all__ = ["Threats", "find_threats", "open_windows"]
+
+
+@lru_cache(maxsize=None)
+def open_windows(size: int, k: int) -> tuple[tuple[int, int], ...]:
+    """every run of k + 1 squares along a line, split into the mask of its
+    two end squares and the mask of the k - 1 squares between them
+
+    A run whose ends are both empty and whose middle squares all belong to
+    one player can be completed at either end, so cannot be stopped.
+    """
+    if k >= size:
+        return ()
+    windows = []
+    for mask in win_masks(size, k + 1):
+        ends = (mask & -mask) | 1 << (mask.bit_length() - 1)
+        windows.append((ends, mask ^ ends))
+    return tuple(windows)
+
+
+class Threats:
+    """the threats one player has on a board
+
+    wins: the mask of empty squares that would complete a line at once
+    fours: the number of open runs of k - 1 counters, which can be
+    completed at either end
+    threes: the mask of empty squares that would make an open run of k - 1,
+    so a win on the next move whatever the opponent does
+    """
+
+    __slots__ = ("wins", "fours", "threes")
+
+    def __init__(self, wins: int = 0, fours: int = 0, threes: int = 0):
+        self.wins = wins
+        self.fours = fours
+        self.threes = threes
+
+    def __repr__(self) -> str:
+        return (
+            f"Threats(wins={list(iter_bits(self.wins))}, fours={self.fours},"
+            f" threes={list(iter_bits(self.threes))})"
+        )
+
+
+def find_threats(masks: list[int], player: int, size: int, k: int) -> Threats:
+    """find the lines player is close to completing
+
+    With k = 5 the fours and threes are the open fours and open threes of
+    gomoku: _XXXX_ and, for example, _XXX__ or _XX_X_.
+
+    masks: the board, [0, player 1, player 2]
+    player: the player to look for threats for
+    size: the number of rows and columns on the board
+    k: the number of counters in a row needed to win
+    returns: the threats found
+    """
+    mine = masks[player]
+    theirs = masks[3 - player]
+    empty = ~(mine | theirs) & ((1 << (size * size)) - 1)
+    threats = Threats()
+
+    # Lines missing a single counter
+    near = k - 1
+    for mask in win_masks(size, k):
+        if not mask & theirs and popcount(mask & mine) == near:
+            threats.wins |= mask & empty
+
+    # Open runs, counted as they are, and one counter short
+    for ends, middle in open_windows(size, k):
+        if ends & empty != ends or middle & theirs:
+            continue
+        count = popcount(middle & mine)
+        if count == near:
+            threats.fours += 1
+        elif count == near - 1:
+            threats.threes |= middle & empty
+    return threats
@@ -0,0 +1,158 @@
+from array import array
+from typing import Optional
+
+__all__ = [
+    "EXACT",
+    "LOWER",
+    "POLICIES",
+    "TranspositionTable",
+    "UPPER",
+]
+
+# The type of bound a stored value represents
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+# The available replacement policies
+POLICIES = ("always", "depth", "two-tier")
+
+# The depth stored in an empty entry, and the move stored for no move
+EMPTY = -1
+NO_MOVE = -1
+
+
+class TranspositionTable:
+    """a fixed size cache of search results, keyed by position
+
+    Each entry holds the value found for a position, whether that value is
+    exact or only a lower or upper bound, the best move and the depth that
+    was searched. The entries are kept in preallocated arrays, one per
+    field, whose size is fixed from the memory budget when the table is
+    created, so however full it gets the table never uses more than
+    max_bytes, plus a few hundred bytes for the arrays themselves.
+
+    Replacement policies, used when a new result maps to an occupied slot:
+    always: the new result always replaces the old one
+    depth: the new result only replaces a result from a shallower search
+    two-tier: each slot holds two entries, one kept by depth and one that
+    is always replaced, which the entry kept by depth moves down to when a
+    deeper result takes its place
+    """
+
+    # The cost of one entry: a 64 bit key and value, a 16 bit depth and
+    # move, and an 8 bit bound
+    ENTRY_BYTES = 8 + 8 + 2 + 2 + 1
+
+    def __init__(self, max_bytes: int = 4 * 1024 * 1024, policy="depth"):
+        """create an empty table
+
+        max_bytes: the memory the table may use
+        policy: the replacement policy, one of POLICIES
+        """
+        if policy not in POLICIES:
+            raise ValueError(
+                "Invalid policy - must be one of " + ", ".join(POLICIES)
+            )
+        self.policy = policy
+        self.max_bytes = max_bytes
+        # Two-tier tables hold two entries in each slot
+        self.ways = 2 if policy == "two-tier" else 1
+        self.slots = max(1, max_bytes // (self.ENTRY_BYTES * self.ways))
+        self.clear()
+
+    def __len__(self) -> int:
+        """the number of occupied entries"""
+        return len(self.depths) - self.depths.count(EMPTY)
+
+    def clear(self):
+        """remove every entry from the table"""
+        entries = self.slots * self.ways
+        self.keys = array("Q", [0]) * entries
+        self.values = array("q", [0]) * entries
+        self.depths = array("h", [EMPTY]) * entries
+        self.moves = array("h", [NO_MOVE]) * entries
+        self.bounds = array("b", [EXACT]) * entries
+        # Usage counters
+        self.hits = 0
+        self.stores = 0
+
+    def _entry(self, index: int) -> tuple[int, int, int, Optional[int]]:
+        """the fields of the entry at index, as returned by probe"""
+        move = self.moves[index]
+        return (
+            self.depths[index],
+            self.values[index],
+            self.bounds[index],
+            None if move == NO_MOVE else move,
+        )
+
+    def _copy(self, source: int, target: int):
+        """copy the entry at source over the entry at target"""
+        self.keys[target] = self.keys[source]
+        self.depths[target] = self.depths[source]
+        self.values[target] = self.values[source]
+        self.bounds[target] = self.bounds[source]
+        self.moves[target] = self.moves[source]
+
+    def probe(self, key: int) -> Optional[tuple[int, int, int, int]]:
+        """look up a position
+
+        key: the 64 bit key of the position
+        returns: (depth, value, bound, move) if the position is stored,
+        otherwise None - the move is a square, numbered i * size + j
+        """
+        index = (key % self.slots) * self.ways
+        if self.keys[index] == key and self.depths[index] != EMPTY:
+            self.hits += 1
+            return self._entry(index)
+        if self.ways == 2:
+            index += 1
+            if self.keys[index] == key and self.depths[index] != EMPTY:
+                self.hits += 1
+                return self._entry(index)
+        return None
+
+    def store(
+        self,
+        key: int,
+        depth: int,
+        value: int,
+        bound: int,
+        move: Optional[int],
+    ):
+        """record the result of a search, subject to the replacement policy
+
+        key: the 64 bit key of the position
+        depth: the number of plies that were searched below the position
+        value: the value found
+        bound: EXACT, LOWER or UPPER
+        move: the square of the best move found, or None
+        """
+        index = (key % self.slots) * self.ways
+        current = self.depths[index]
+        if current != EMPTY and self.keys[index] != key:
+            if self.policy == "depth":
+                # Keep the deeper result, unless it is for the same position
+                if current > depth:
+                    return
+            elif self.policy == "two-tier":
+                # Results from deeper searches go in the first tier,
+                # everything else falls through to the always-replace
+                # second tier
+                if current > depth:
+                    index += 1
+                else:
+                    # The result pushed out of the first tier is still
+                    # worth keeping, so it moves down to the second
+                    self._copy(index, index + 1)
+        if self.ways == 2 and not index % 2 and self.keys[index + 1] == key:
+            # An older result for the same position in the second tier is
+            # out of date, and would only take up room, so it is dropped
+            self.depths[index + 1] = EMPTY
+        self.keys[index] = key
+        self.depths[index] = depth
+        self.values[index] = value
+        self.bounds[index] = bound
+        self.moves[index] = NO_MOVE if move is None else move
+        self.stores += 1
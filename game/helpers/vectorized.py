@@ -0,0 +1,73 @@
+"""Win detection for whole arrays of boards at once, using NumPy
+
+This needs NumPy to be installed, so it is not imported by game.helpers.
+"""
+
+from functools import lru_cache
+
+import numpy as np
+
+from .bitboard import win_masks
+
+__all__ = ["check_for_win_batch", "line_incidence", "line_indices"]
+
+
+@lru_cache(maxsize=None)
+def line_indices(size: int) -> np.ndarray:
+    """a (lines, size) array holding the flat index of each square in each
+    winning line, with the lines in the order check_for_win looks at them"""
+    return np.array(
+        [
+            [square for square in range(size * size) if mask >> square & 1]
+            for mask in win_masks(size)
+        ],
+        dtype=np.intp,
+    )
+
+
+@lru_cache(maxsize=None)
+def line_incidence(size: int) -> np.ndarray:
+    """a (lines, squares) array with a 1 where the line passes through the
+    square"""
+    incidence = np.zeros((len(win_masks(size)), size * size), dtype=np.int16)
+    for line, squares in enumerate(line_indices(size)):
+        incidence[line, squares] = 1
+    return incidence
+
+
+def check_for_win_batch(boards, early_draw: bool = False) -> np.ndarray:
+    """check_for_win for every board in an array
+
+    boards: an (M, N, N) array of boards, holding 0, 1 or 2 in each square
+    early_draw: report a draw as soon as neither player can complete a
+    line, as check_for_win does
+
+    returns: an (M,) array with, for each board
+    0: game not over
+    -1: game ended with a draw
+    1: Player 1 won
+    2: Player 2 won"""
+    boards = np.asarray(boards)
+    count, size = boards.shape[0], boards.shape[1]
+    flat = boards.reshape(count, size * size)
+    # Every line of every board, in one (M, lines, N) gather
+    lines = flat[:, line_indices(size)]
+    ones = (lines == 1).all(axis=2)
+    twos = (lines == 2).all(axis=2)
+
+    results = np.zeros(count, dtype=np.int8)
+    # The first complete line decides the result, as it does when the
+    # lines are checked one at a time
+    complete = ones | twos
+    won = complete.any(axis=1)
+    first = complete.argmax(axis=1)
+    results[won] = np.where(ones[won, first[won]], 1, 2)
+
+    # Boards that nobody has won are drawn when full
+    drawn = ~won & (flat != 0).all(axis=1)
+    if early_draw:
+        # ... or when every line holds counters of both players
+        dead = ((lines == 1).any(axis=2) & (lines == 2).any(axis=2)).all(1)
+        drawn |= ~won & dead
+    results[drawn] = -1
+    return results
@@ -0,0 +1,115 @@
+from functools import lru_cache
+
+from .bitboard import iter_bits, popcount
+
+__all__ = ["symmetries", "zobrist_hash", "zobrist_keys"]
+
+# Keys are 64 bits, drawn from a fixed seed so that every process - and
+# every run - gives a position the same key
+MASK64 = (1 << 64) - 1
+SEED = 0x7469_6354_6163_546F
+
+
+def _splitmix64(state: int):
+    """an endless stream of well mixed 64 bit numbers"""
+    while True:
+        state = (state + 0x9E37_79B9_7F4A_7C15) & MASK64
+        z = state
+        z = ((z ^ z >> 30) * 0xBF58_476D_1CE4_E5B9) & MASK64
+        z = ((z ^ z >> 27) * 0x94D0_49BB_1331_11EB) & MASK64
+        yield z ^ z >> 31
+
+
+@lru_cache(maxsize=None)
+def zobrist_keys(size: int) -> tuple[tuple[tuple[int, ...], ...], int]:
+    """the random keys a board's key is built from
+
+    A board's key is the XOR of the key of each counter on it, by square
+    and player, and the side key if player 2 is to move - that is, if
+    there are an odd number of counters. Making or taking back a move
+    changes the key by the counter's key and the side key, whatever else
+    is on the board.
+
+    size: the number of rows and columns on the board
+    returns: the keys by player and square, [0] for no counter, and the
+    side key
+    """
+    numbers = _splitmix64(SEED ^ size)
+    squares = size * size
+    keys = tuple(
+        tuple(0 if player == 0 else next(numbers) for _ in range(squares))
+        for player in range(3)
+    )
+    return keys, next(numbers)
+
+
+@lru_cache(maxsize=None)
+def move_keys(size: int) -> tuple[tuple[int, ...], ...]:
+    """the change to a board's key when a counter is added or taken away,
+    by player and square - the counter's key and the side key together"""
+    keys, side = zobrist_keys(size)
+    return tuple(
+        tuple(0 if player == 0 else key ^ side for key in keys[player])
+        for player in range(3)
+    )
+
+
+@lru_cache(maxsize=None)
+def symmetries(size: int) -> tuple[tuple[int, ...], ...]:
+    """the 8 rotations and reflections of the board, each as the square
+    every square is moved to, the first leaving the board as it is"""
+    last = size - 1
+    maps = (
+        lambda i, j: (i, j),
+        lambda i, j: (j, last - i),
+        lambda i, j: (last - i, last - j),
+        lambda i, j: (last - j, i),
+        lambda i, j: (i, last - j),
+        lambda i, j: (last - i, j),
+        lambda i, j: (j, i),
+        lambda i, j: (last - j, last - i),
+    )
+    images = []
+    for move in maps:
+        image = []
+        for square in range(size * size):
+            i, j = move(*divmod(square, size))
+            image.append(i * size + j)
+        images.append(tuple(image))
+    return tuple(images)
+
+
+@lru_cache(maxsize=None)
+def symmetric_move_keys(
+    size: int,
+) -> tuple[tuple[tuple[int, ...], ...], ...]:
+    """the change to the key of each of the 8 symmetric boards when a
+    counter is added or taken away, by player and square"""
+    moves = move_keys(size)
+    images = symmetries(size)
+    return tuple(
+        tuple(
+            tuple(moves[player][image[square]] for image in images)
+            for square in range(size * size)
+        )
+        for player in range(3)
+    )
+
+
+def zobrist_hash(masks: list[int], size: int, symmetry: int = 0) -> int:
+    """work out the key of a board from scratch
+
+    masks: the board, [0, player 1, player 2]
+    size: the number of rows and columns on the board
+    symmetry: the index into symmetries(size) of the rotation or
+    reflection of the board to find the key of
+    """
+    keys, side = zobrist_keys(size)
+    image = symmetries(size)[symmetry]
+    key = 0
+    for player in (1, 2):
+        for square in iter_bits(masks[player]):
+            key ^= keys[player][image[square]]
+    if popcount(masks[1] | masks[2]) & 1:
+        key ^= side
+    return key
@@ -0,0 +1,219 @@
+"""A Monte Carlo tree search bot for 2D (ultimate) tic-tac-toe
+
+Rather than looking at every move, the bot plays many random games
+(playouts) from the current position, and grows a tree of the moves that
+have done best in them, using UCT to balance trying the moves that look
+strongest against trying the ones it knows least about.
+
+The tree is held in flat lists indexed by node number, not one object per
+node. The children of a node are created together when it is expanded,
+so they sit next to each other and a node only needs to know where its
+children start and how many there are.
+
+With several workers, each process grows its own tree from the same
+position (root parallelism), and the visit counts of the moves at the
+root are added together to choose the move.
+"""
+
+import math
+import random
+from time import perf_counter
+from typing import Optional
+
+from .ultimate import UltimateGame
+
+__all__ = ["MCTSBot"]
+
+# Playouts that go on longer than this are scored as draws
+MAX_PLAYOUT = 400
+
+
+def search(
+    game: UltimateGame,
+    playouts: int,
+    time_limit: Optional[float] = None,
+    exploration: float = 1.4,
+    seed: Optional[int] = None,
+) -> dict[int, tuple[int, float]]:
+    """grow a tree from a position
+
+    game: the position to search from, which is left as it was
+    playouts: the most playouts to run
+    time_limit: the most seconds to run for, None for no limit
+    exploration: how much UCT favours moves that have been tried less
+    seed: the seed for the random playouts
+    returns: the visits and score of each move at the root, where the
+    score counts 1 for each win and 0.5 for each draw
+    """
+    rng = random.Random(seed)
+    deadline = None if time_limit is None else perf_counter() + time_limit
+
+    # The tree, one entry per node: the move that led to it, the player who
+    # made that move, where its children start and how many there are
+    # (-1 before it has been expanded), and its playout statistics
+    moves = [-1]
+    movers = [3 - game.player]
+    first_child = [0]
+    child_count = [-1]
+    visits = [0]
+    scores = [0.0]
+
+    for playout in range(playouts):
+        if deadline is not None and not playout & 15:
+            if perf_counter() > deadline:
+                break
+
+        # Selection - follow the best UCT score down to a leaf
+        node = 0
+        path = [0]
+        while child_count[node] > 0 and not game.result:
+            start = first_child[node]
+            log_parent = math.log(visits[node])
+            best = -1.0
+            for child in range(start, start + child_count[node]):
+                if not visits[child]:
+                    best_child = child
+                    break
+                value = scores[child] / visits[child] + exploration * (
+                    math.sqrt(log_parent / visits[child])
+                )
+                if value > best:
+                    best = value
+                    best_child = child
+            node = best_child
+            game.make(moves[node])
+            path.append(node)
+
+        # Expansion - add every move from the leaf, and step into one
+        if child_count[node] < 0 and not game.result:
+            legal = game.legal_moves()
+            first_child[node] = len(moves)
+            child_count[node] = len(legal)
+            for move in legal:
+                moves.append(move)
+                movers.append(game.player)
+                first_child.append(0)
+                child_count.append(-1)
+                visits.append(0)
+                scores.append(0.0)
+            node = first_child[node] + rng.randrange(len(legal))
+            game.make(moves[node])
+            path.append(node)
+
+        # Simulation - play randomly to the end of the game
+        made = 0
+        while not game.result and made < MAX_PLAYOUT:
+            game.make(rng.choice(game.legal_moves()))
+            made += 1
+        result = game.result
+
+        # Put the position back
+        for _ in range(made + len(path) - 1):
+            game.unmake()
+
+        # Backpropagation - credit each move on the path with the result
+        for node in path:
+            visits[node] += 1
+            if result == movers[node]:
+                scores[node] += 1.0
+            elif result <= 0:
+                scores[node] += 0.5
+
+    start = first_child[0]
+    return {
+        moves[child]: (visits[child], scores[child])
+        for child in range(start, start + max(child_count[0], 0))
+    }
+
+
+def _search_copy(
+    game: UltimateGame,
+    playouts: int,
+    time_limit: Optional[float],
+    exploration: float,
+    seed: Optional[int],
+) -> dict[int, tuple[int, float]]:
+    """run search in a worker process on a copy of the position"""
+    return search(game.copy(), playouts, time_limit, exploration, seed)
+
+
+class MCTSBot:
+    """chooses moves in a 2D game by Monte Carlo tree search"""
+
+    def __init__(
+        self,
+        playouts: int = 5000,
+        time_limit: Optional[float] = 1.0,
+        exploration: float = 1.4,
+        workers: int = 1,
+        seed: Optional[int] = None,
+    ):
+        """set up the bot
+
+        playouts: the most playouts to run for each move, in each worker
+        time_limit: the most seconds to spend on each move, None for no
+        limit
+        exploration: how much the search favours moves tried less often
+        workers: the number of processes that each grow a tree - the pool
+        is started on the first move and kept until close() is called
+        seed: the seed for the random playouts, for repeatable play
+        """
+        self.playouts = playouts
+        self.time_limit = time_limit
+        self.exploration = exploration
+        self.workers = workers
+        self.rng = random.Random(seed)
+        self.pool = None
+
+    def choose_move(self, game: UltimateGame) -> int:
+        """find the best move in a position
+
+        returns: the move, as 9 * game + square
+        """
+        legal = game.legal_moves()
+        if len(legal) == 1:
+            return legal[0]
+
+        seeds = [self.rng.getrandbits(32) for _ in range(self.workers)]
+        if self.workers > 1:
+            if self.pool is None:
+                # Only imported when needed, as it is slow to import
+                from concurrent.futures import ProcessPoolExecutor
+
+                self.pool = ProcessPoolExecutor(max_workers=self.workers)
+            futures = [
+                self.pool.submit(
+                    _search_copy,
+                    game,
+                    self.playouts,
+                    self.time_limit,
+                    self.exploration,
+                    seed,
+                )
+                for seed in seeds
+            ]
+            results = [future.result() for future in futures]
+        else:
+            results = [
+                _search_copy(
+                    game,
+                    self.playouts,
+                    self.time_limit,
+                    self.exploration,
+                    seeds[0],
+                )
+            ]
+
+        # Add the trees' root statistics together, and play the move that
+        # was visited most
+        totals = dict.fromkeys(legal, 0)
+        for result in results:
+            for move, (visits, _) in result.items():
+                totals[move] += visits
+        return max(legal, key=totals.__getitem__)
+
+    def close(self):
+        """stop any worker processes the bot started"""
+        if self.pool is not None:
+            self.pool.shutdown(cancel_futures=True)
+            self.pool = None
@@ -0,0 +1,197 @@
+"""Searching the moves at the root of the tree across several processes
+
+The first move is searched on its own to get a score to beat (the 'young
+brothers wait' rule), then the remaining moves are shared out across a
+pool of worker processes. Every worker publishes the best score it finds
+to a shared value, and each search that starts later uses it as alpha, so
+it can still prune against moves searched elsewhere. A score that is no
+better than the alpha it was searched with is only an upper bound, so a
+move that looks better than the best found here is searched again against
+that before it is played.
+
+The shared value is tagged with the number of the search it belongs to,
+so workers still running a search that was given up on - which they are
+not told about - cannot spoil the next one.
+
+The pool is kept by the bot and reused for every move it chooses, and each
+worker keeps its own bot, so its transposition table stays warm from one
+move to the next.
+"""
+
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from time import perf_counter
+from typing import Optional
+
+from .game_class import INFINITY, Bot, SearchTimeout
+from .helpers import Board
+
+__all__ = ["RootSplitPool"]
+
+# The number of the search being run and the best score found so far for
+# it, shared by every worker in the pool
+_shared_alpha = None
+GENERATION = 0
+ALPHA = 1
+
+# The bot each worker process searches with, by its settings
+_worker_bots: dict[tuple, Bot] = {}
+
+
+def _init_worker(shared_alpha):
+    """keep the shared score in the worker process"""
+    global _shared_alpha
+    _shared_alpha = shared_alpha
+
+
+def _search_move(
+    settings: tuple,
+    masks: list[int],
+    square: int,
+    depth: Optional[int],
+    time_left: Optional[float],
+    generation: int,
+) -> Optional[tuple[int, int, bool, int]]:
+    """search one root move in a worker process
+
+    settings: the bot's player, board size and search options
+    masks: the board, [0, player 1, player 2]
+    square: the bot's move to search
+    depth: how many moves ahead to look from the root
+    time_left: the seconds left to choose the move in
+    generation: the number of the search the move is part of
+    returns: (score, the alpha it was searched with, whether the search
+    hit the depth limit, nodes searched), or None if the time ran out or
+    the search has been given up on
+    """
+    # Moves handed out later start from the best score found elsewhere
+    with _shared_alpha.get_lock():
+        current, alpha = _shared_alpha[:]
+    if current != generation:
+        return None
+
+    bot = _worker_bots.get(settings)
+    if bot is None:
+        (
+            player,
+            size,
+            table_bytes,
+            table_policy,
+            ordering,
+            engine,
+            k,
+        ) = settings
+        bot = Bot(
+            player,
+            [[0] * size for _ in range(size)],
+            table_bytes=table_bytes,
+            table_policy=table_policy,
+            ordering=ordering,
+            engine=engine,
+            k=k,
+        )
+        _worker_bots[settings] = bot
+    bot.update_board(Board(bot.board_size, masks))
+    bot.nodes = 0
+    bot.truncated = False
+    bot.deadline = None if time_left is None else perf_counter() + time_left
+
+    try:
+        value = bot.search_root_move(square, alpha, depth)
+    except SearchTimeout:
+        return None
+    finally:
+        bot.deadline = None
+
+    # Let the moves that start after this one prune against it
+    with _shared_alpha.get_lock():
+        if (
+            _shared_alpha[GENERATION] == generation
+            and value > _shared_alpha[ALPHA]
+        ):
+            _shared_alpha[ALPHA] = value
+    return value, alpha, bot.truncated, bot.nodes
+
+
+class RootSplitPool:
+    """a pool of worker processes that search root moves for a bot"""
+
+    def __init__(self, workers: int):
+        """start the pool
+
+        workers: the number of processes to search with
+        """
+        self.workers = workers
+        self.generation = 0
+        self.shared_alpha = multiprocessing.Array("q", [0, -INFINITY])
+        self.executor = ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(self.shared_alpha,),
+        )
+
+    def search(self, bot: Bot, depth: Optional[int]) -> tuple[int, tuple]:
+        """search every move from the bot's position
+
+        bot: the bot choosing a move, set up with the position
+        depth: how many moves ahead to look
+        returns: the score and the best move
+        """
+        moves = bot.root_moves()
+        if not moves:
+            return bot.alphabeta(depth=depth)
+
+        # The eldest move is searched first, to give a score to beat
+        best_square = moves[0]
+        best_value = bot.search_root_move(best_square, -INFINITY, depth)
+        self.generation += 1
+        with self.shared_alpha.get_lock():
+            self.shared_alpha[:] = [self.generation, best_value]
+
+        # The rest are shared out, in order, across the pool
+        settings = bot.worker_settings()
+        masks = list(bot.board.masks)
+        time_left = None
+        if bot.deadline is not None:
+            time_left = bot.deadline - perf_counter()
+            if time_left <= 0:
+                raise SearchTimeout
+        futures = [
+            self.executor.submit(
+                _search_move,
+                settings,
+                masks,
+                square,
+                depth,
+                time_left,
+                self.generation,
+            )
+            for square in moves[1:]
+        ]
+        try:
+            for square, future in zip(moves[1:], futures):
+                result = future.result()
+                if result is None or bot.cancelled:
+                    raise SearchTimeout
+                value, alpha, truncated, nodes = result
+                bot.nodes += nodes
+                bot.truncated = bot.truncated or truncated
+                # A score no better than the alpha the move was searched
+                # with, taken from a move searched elsewhere, only says the
+                # move is at most that good - search it again against the
+                # best move here to find out whether it beats it
+                if best_value < value <= alpha:
+                    value = bot.search_root_move(square, best_value, depth)
+                # Ties go to the move that was ordered first
+                if value > best_value:
+                    best_value, best_square = value, square
+        except SearchTimeout:
+            # Stop the moves still waiting, and give up on this depth
+            for waiting in futures:
+                waiting.cancel()
+            raise
+        return best_value, divmod(best_square, bot.board_size)
+
+    def close(self):
+        """stop the worker processes"""
+        self.executor.shutdown(cancel_futures=True)
@@ -0,0 +1,283 @@
+"""A compact binary record of finished games
+
+Games are appended to segment files in a directory, each starting with a
+marker, a version byte and the offset up to which the segment is known to
+hold whole games. Every game is a four byte header - the board
+size, k, the result (as returned by check_for_win) and the number of
+moves - followed by one byte per move, the square played numbered
+i * size + j. Player 1 always moves first and the players take turns, so
+the player of each move is not stored.
+
+Once a segment reaches a set size, the next game starts a new one, and
+segments are never rewritten. Readers memory-map each segment and step
+from one header to the next, so a game is only replayed when it is asked
+for and a file is never read into memory as a whole. A game cut short by
+a write that did not finish ends the segment. The writer records how far
+the segment is whole each time it closes it, so on opening the segment
+again it only has to check the games written after that.
+
+    python -m game.records games/
+"""
+
+import argparse
+import json
+import mmap
+import struct
+from pathlib import Path
+from typing import Iterable, Iterator, Union
+
+from .game_class import Game
+
+__all__ = [
+    "GameRecord",
+    "RecordWriter",
+    "read_positions",
+    "read_records",
+    "segments",
+]
+
+# Each segment starts with a marker, the version of the format and the
+# offset up to which the writer last found it to hold whole games
+MAGIC = b"TTTR"
+VERSION = 1
+CHECKED = struct.Struct("<Q")
+CHECKED_AT = len(MAGIC) + 1
+FILE_HEADER = CHECKED_AT + CHECKED.size
+
+# The header of each game: size, k, result and number of moves
+RECORD = struct.Struct("<BBbB")
+
+# Segments are named by number, and a new one is started once the last
+# would grow past this many bytes
+SUFFIX = ".ttr"
+SEGMENT_BYTES = 64 * 1024 * 1024
+
+# The square of a move and the number of moves are a byte each, so 15x15
+# is the largest board that can be recorded
+MAX_SIZE = 15
+
+
+class GameRecord:
+    """one finished game read from a segment"""
+
+    __slots__ = ("size", "k", "result", "moves")
+
+    def __init__(self, size: int, k: int, result: int, moves: bytes):
+        """
+        size: the number of rows and columns on the board
+        k: the number of counters in a row needed to win
+        result: the state the game ended in, as check_for_win
+        moves: the square of each move, in the order they were played
+        """
+        self.size = size
+        self.k = k
+        self.result = result
+        self.moves = moves
+
+    def replay(self) -> Iterator[Game]:
+        """play the game through move by move
+
+        returns: the game after each move - the same Game each time, so
+        copy anything that needs to be kept before asking for the next
+        """
+        game = Game(self.size, k=self.k)
+        for number, square in enumerate(self.moves):
+            game.current_player = number % 2 + 1
+            game.place(game.current_player, *divmod(square, self.size))
+            yield game
+
+    def game(self) -> Game:
+        """the game as it finished"""
+        game = Game(self.size, k=self.k)
+        for game in self.replay():
+            pass
+        return game
+
+    def __repr__(self) -> str:
+        return (
+            f"GameRecord(size={self.size}, k={self.k}, result={self.result},"
+            f" moves={list(self.moves)})"
+        )
+
+
+def encode(game: Game) -> bytes:
+    """the record of a game
+
+    raises: ValueError if the board is too large to record, the game did
+    not start from an empty board, or the players did not take turns
+    starting with player 1
+    """
+    if game.size > MAX_SIZE:
+        raise ValueError(f"Invalid game - larger than {MAX_SIZE}x{MAX_SIZE}")
+    moves = bytes(game.board.history)
+    # Only the moves are stored, so every counter must have come from one
+    filled = game.size * game.size - len(game.board.empties)
+    if len(moves) != filled:
+        raise ValueError("Invalid game - it must start from an empty board")
+    cells = game.board.cells
+    if any(
+        cells[square] != number % 2 + 1 for number, square in enumerate(moves)
+    ):
+        raise ValueError("Invalid game - the players must take turns")
+    return (
+        RECORD.pack(game.size, game.k, game.check_for_win(), len(moves))
+        + moves
+    )
+
+
+def segments(directory: Union[str, Path]) -> list[Path]:
+    """the segment files in a directory, oldest first"""
+    return sorted(Path(directory).glob("*" + SUFFIX))
+
+
+class RecordWriter:
+    """appends games to the segments in a directory"""
+
+    def __init__(
+        self, directory: Union[str, Path], segment_bytes: int = SEGMENT_BYTES
+    ):
+        """open the newest segment in the directory, creating it if needed
+
+        segment_bytes: the size a segment may grow to before a new one is
+        started
+        """
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.segment_bytes = segment_bytes
+        existing = segments(self.directory)
+        self.number = int(existing[-1].stem) if existing else 0
+        self.file = None
+        self._open()
+
+    def _open(self):
+        """open segment self.number for appending"""
+        path = self.directory / f"{self.number:08d}{SUFFIX}"
+        if not path.exists() or not path.stat().st_size:
+            self.file = open(path, "w+b")
+            self.file.write(MAGIC + bytes([VERSION]))
+            self.file.write(CHECKED.pack(FILE_HEADER))
+            self.written = FILE_HEADER
+            return
+        self.file = open(path, "r+b")
+        header = self.file.read(FILE_HEADER)
+        if len(header) < FILE_HEADER or header[: len(MAGIC)] != MAGIC:
+            raise ValueError("Invalid segment - " + str(path))
+        (checked,) = CHECKED.unpack_from(header, CHECKED_AT)
+        self.written = self.file.seek(0, 2)
+        # Games written since the segment was last closed may have been
+        # left cut short - drop any that were, so that the games appended
+        # after them can still be read
+        if self.written > checked:
+            end = _records_end(path, checked)
+            if end < self.written:
+                self.file.truncate(end)
+                self.written = self.file.seek(end)
+
+    def write(self, game: Game):
+        """append a game, starting a new segment if this one is full"""
+        record = encode(game)
+        if self.written > FILE_HEADER and (
+            self.written + len(record) > self.segment_bytes
+        ):
+            self._close()
+            self.number += 1
+            self._open()
+        self.file.write(record)
+        self.written += len(record)
+
+    def _close(self):
+        """note that the segment is whole up to here, and close it"""
+        self.file.flush()
+        self.file.seek(CHECKED_AT)
+        self.file.write(CHECKED.pack(self.written))
+        self.file.close()
+
+    def close(self):
+        """write out anything buffered and close the segment"""
+        if self.file is not None:
+            self._close()
+            self.file = None
+
+    def __enter__(self) -> "RecordWriter":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _read_segment(
+    path: Path, offset: int = FILE_HEADER
+) -> Iterator[GameRecord]:
+    """every game in one segment
+
+    offset: where in the segment to start reading, at the header of a game
+    """
+    with open(path, "rb") as file:
+        if not file.seek(0, 2):
+            return
+        data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    with data:
+        if data[: len(MAGIC)] != MAGIC or data[len(MAGIC)] != VERSION:
+            raise ValueError("Invalid segment - " + str(path))
+        end = len(data)
+        unpack = RECORD.unpack_from
+        while offset + RECORD.size <= end:
+            size, k, result, count = unpack(data, offset)
+            start = offset + RECORD.size
+            offset = start + count
+            # A record cut short is the end of what was written
+            if offset > end:
+                return
+            yield GameRecord(size, k, result, data[start:offset])
+
+
+def _records_end(path: Path, offset: int) -> int:
+    """the offset just past the last whole game in a segment
+
+    offset: where to start looking, at the header of a game
+    """
+    return offset + sum(
+        RECORD.size + len(record.moves)
+        for record in _read_segment(path, offset)
+    )
+
+
+def read_records(paths: Iterable[Union[str, Path]]) -> Iterator[GameRecord]:
+    """every game in some segments or directories of segments, in the
+    order they were written"""
+    for path in paths:
+        path = Path(path)
+        for segment in segments(path) if path.is_dir() else [path]:
+            yield from _read_segment(segment)
+
+
+def read_positions(
+    paths: Iterable[Union[str, Path]],
+) -> Iterator[tuple[GameRecord, Game]]:
+    """every position in some segments or directories of segments, one
+    game after another
+
+    returns: each game's record, and the game after each of its moves - the
+    same Game for every move of a game
+    """
+    for record in read_records(paths):
+        for game in record.replay():
+            yield record, game
+
+
+def main():
+    """count the games in some segments from the command line"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("paths", nargs="+", help="segments or directories")
+    args = parser.parse_args()
+    games = moves = 0
+    results = {}
+    for record in read_records(args.paths):
+        games += 1
+        moves += len(record.moves)
+        results[record.result] = results.get(record.result, 0) + 1
+    print(json.dumps({"games": games, "moves": moves, "results": results}))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,285 @@
+"""Host many games at once over a socket
+
+Each connection is one session, which plays any number of games against
+the bot, one after another. Requests and replies are JSON objects, one per
+line:
+
+    {"op": "new", "size": 3}
+    {"op": "new", "size": 15, "k": 5}
+    {"op": "move", "row": 0, "column": 2}
+    {"op": "stats"}
+
+Every reply has "ok", and either "error" or the board, the state of the
+game (as returned by check_for_win) and the bot's move. Rows and columns
+are numbered from 0.
+
+The bot searches in a bounded pool of threads, so a long search never
+holds up the event loop, and at most a fixed number of searches run at
+once - the rest wait their turn. Sessions that send nothing for too long
+are closed. The searches are pure Python, so the threads take turns holding
+the GIL and between them use a single core - run one server per core to
+use more. A process pool would not share the GIL, but each move would then
+have to send the game to another process, and a session's bot could not
+keep its transposition table from one move to the next.
+
+Each session's bot has a small transposition table of its own, so that
+memory grows slowly with the number of sessions - raise --table-bytes for
+stronger play with fewer sessions.
+
+    python -m game.server --port 8765
+    python -m game.server --unix /tmp/tic-tac-toe.sock
+"""
+
+import argparse
+import asyncio
+import json
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+from typing import Optional
+
+from .game_class import Bot, Game
+
+__all__ = ["GameServer"]
+
+# The longest request line accepted, in bytes
+MAX_LINE = 4096
+
+
+class GameServer:
+    """an asyncio server for games against the bot"""
+
+    def __init__(
+        self,
+        workers: int = 4,
+        max_sessions: int = 10_000,
+        idle_timeout: float = 300.0,
+        move_time: float = 0.5,
+        max_size: int = 15,
+        table_bytes: int = 64 * 1024,
+    ):
+        """set up the server
+
+        workers: the number of threads the bot searches in
+        max_sessions: the most sessions to host at once - further
+        connections are turned away
+        idle_timeout: the seconds a session may wait between requests
+        move_time: the seconds the bot may spend on each move
+        max_size: the largest board a session may ask for
+        table_bytes: the memory each session's bot may use for its
+        transposition table
+        """
+        self.workers = workers
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.move_time = move_time
+        self.max_size = max_size
+        self.table_bytes = table_bytes
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        # Searches beyond the number of workers wait here, rather than
+        # queueing up without limit in the executor
+        self.searches = asyncio.Semaphore(workers)
+        self.sessions = 0
+        self.games = 0
+        # The time taken for recent bot moves, including waiting for a
+        # worker
+        self.latencies = deque(maxlen=10_000)
+        self.server = None
+
+    async def start(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 8765,
+        path: Optional[str] = None,
+    ):
+        """start listening on a TCP port, or a Unix socket if path is given"""
+        if path is not None:
+            self.server = await asyncio.start_unix_server(
+                self.handle, path=path, limit=MAX_LINE
+            )
+        else:
+            self.server = await asyncio.start_server(
+                self.handle, host, port, limit=MAX_LINE
+            )
+        return self.server
+
+    async def close(self):
+        """stop listening, and stop the search threads"""
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> dict:
+        """the number of sessions and games, and the bot's move latency"""
+        latencies = sorted(self.latencies)
+
+        def percentile(fraction: float) -> Optional[float]:
+            if not latencies:
+                return None
+            index = min(len(latencies) - 1, int(fraction * len(latencies)))
+            return round(latencies[index] * 1000, 3)
+
+        return {
+            "sessions": self.sessions,
+            "games": self.games,
+            "moves": len(latencies),
+            "p50_ms": percentile(0.5),
+            "p99_ms": percentile(0.99),
+        }
+
+    async def handle(self, reader, writer):
+        """run one session"""
+        if self.sessions >= self.max_sessions:
+            await self.send(writer, {"ok": False, "error": "Server full"})
+            writer.close()
+            return
+
+        self.sessions += 1
+        game = None
+        try:
+            while True:
+                try:
+                    line = await asyncio.wait_for(
+                        reader.readline(), self.idle_timeout
+                    )
+                except asyncio.TimeoutError:
+                    await self.send(writer, {"ok": False, "error": "Timeout"})
+                    break
+                except ValueError:
+                    await self.send(
+                        writer, {"ok": False, "error": "Request too long"}
+                    )
+                    break
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                    op = request["op"]
+                except (ValueError, KeyError, TypeError):
+                    await self.send(
+                        writer, {"ok": False, "error": "Invalid request"}
+                    )
+                    continue
+
+                if op == "new":
+                    game, reply = self.new_game(request)
+                elif op == "move":
+                    reply = await self.move(game, request)
+                elif op == "stats":
+                    reply = {"ok": True, **self.stats()}
+                else:
+                    reply = {"ok": False, "error": "Unknown op"}
+                # Waiting for the reply to be sent stops a client that does
+                # not read from piling up replies in memory
+                await self.send(writer, reply)
+        except ConnectionError:
+            pass
+        finally:
+            self.sessions -= 1
+            writer.close()
+
+    async def send(self, writer, reply: dict):
+        """write a reply, and wait until there is room for more"""
+        writer.write(json.dumps(reply).encode() + b"\n")
+        await writer.drain()
+
+    def new_game(self, request: dict) -> tuple[Optional[Game], dict]:
+        """start a game, with the session playing first"""
+        size = request.get("size", 3)
+        if not isinstance(size, int) or not 3 <= size <= self.max_size:
+            return None, {"ok": False, "error": "Invalid size"}
+        k = request.get("k", size)
+        if not isinstance(k, int) or not 3 <= k <= size:
+            return None, {"ok": False, "error": "Invalid k"}
+        game = Game(size, k=k)
+        # The default bot's table would cost megabytes for every session
+        game.opponent = Bot(
+            2,
+            game.board,
+            table_bytes=self.table_bytes,
+            time_limit=self.move_time,
+        )
+        self.games += 1
+        return game, self.reply(game)
+
+    async def move(self, game: Optional[Game], request: dict) -> dict:
+        """play the session's move, then the bot's reply"""
+        if game is None:
+            return {"ok": False, "error": "No game - send new first"}
+        if game.check_for_win():
+            return {"ok": False, "error": "The game is over"}
+        i, j = request.get("row"), request.get("column")
+        if (
+            not isinstance(i, int)
+            or not isinstance(j, int)
+            or not 0 <= i < game.size
+            or not 0 <= j < game.size
+            or game.board[i][j] != 0
+        ):
+            return {"ok": False, "error": "Invalid move"}
+
+        game.place(1, i, j)
+        if game.check_for_win():
+            return self.reply(game)
+
+        # Search in a worker thread, once one is free
+        start = perf_counter()
+        async with self.searches:
+            loop = asyncio.get_running_loop()
+            bot_i, bot_j = await loop.run_in_executor(
+                self.executor, game.opponent.choose_move, game
+            )
+        self.latencies.append(perf_counter() - start)
+        game.place(2, bot_i, bot_j)
+        return self.reply(game, (bot_i, bot_j))
+
+    def reply(self, game: Game, bot_move: Optional[tuple] = None) -> dict:
+        """the state of a game, to send to the session"""
+        return {
+            "ok": True,
+            "board": [list(row) for row in game.board],
+            "state": game.check_for_win(),
+            "bot_move": None if bot_move is None else list(bot_move),
+        }
+
+
+async def serve(args: argparse.Namespace):
+    """run the server until it is interrupted"""
+    server = GameServer(
+        workers=args.workers,
+        max_sessions=args.max_sessions,
+        idle_timeout=args.idle_timeout,
+        move_time=args.move_time,
+        max_size=args.max_size,
+        table_bytes=args.table_bytes,
+    )
+    listener = await server.start(args.host, args.port, args.unix)
+    try:
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        print(json.dumps(server.stats()))
+        await server.close()
+
+
+def main():
+    """start a server from the command line"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", default=None, help="a Unix socket path")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--max-sessions", type=int, default=10_000)
+    parser.add_argument("--idle-timeout", type=float, default=300.0)
+    parser.add_argument("--move-time", type=float, default=0.5)
+    parser.add_argument("--max-size", type=int, default=15)
+    parser.add_argument("--table-bytes", type=int, default=64 * 1024)
+    try:
+        asyncio.run(serve(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+"""Play many games at once, to compare how well different players do
+
+All the games in a batch are kept in one NumPy array of shape
+(games, size, size), and every game in the batch makes its move together,
+so each step of every game costs a handful of array operations instead of
+a Python loop per game. This needs NumPy to be installed.
+
+    python -m game.simulate --games 1000000 --players greedy random
+"""
+
+import argparse
+import json
+from typing import Optional
+
+import numpy as np
+
+from .helpers.vectorized import line_incidence
+
+__all__ = ["POLICIES", "simulate"]
+
+# The ways of choosing moves
+POLICIES = ("random", "greedy", "table")
+
+
+def _line_counts(boards: np.ndarray, player: int) -> np.ndarray:
+    """the number of player's counters in every line of every board
+
+    boards: a (games, squares) array
+    returns: a (games, lines) array
+    """
+    size = int(round(boards.shape[1] ** 0.5))
+    return (boards == player).astype(np.int16) @ line_incidence(size).T
+
+
+def _random_moves(boards: np.ndarray, rng: np.random.Generator):
+    """pick an empty square on each board uniformly at random"""
+    noise = rng.random(boards.shape)
+    noise[boards != 0] = -1.0
+    return noise.argmax(axis=1)
+
+
+def _greedy_moves(
+    boards: np.ndarray, player: int, rng: np.random.Generator
+) -> np.ndarray:
+    """win if possible, otherwise block the opponent's win, otherwise pick
+    at random"""
+    size = int(round(boards.shape[1] ** 0.5))
+    incidence = line_incidence(size)
+    mine = _line_counts(boards, player)
+    theirs = _line_counts(boards, 3 - player)
+    # Lines one counter from complete, for each player
+    winning = ((mine == size - 1) & (theirs == 0)).astype(np.int16)
+    blocking = ((theirs == size - 1) & (mine == 0)).astype(np.int16)
+    # Random noise breaks ties, and is smaller than either bonus
+    scores = rng.random(boards.shape)
+    scores += 4.0 * (winning @ incidence > 0)
+    scores += 2.0 * (blocking @ incidence > 0)
+    scores[boards != 0] = -1.0
+    return scores.argmax(axis=1)
+
+
+def _table_moves(boards: np.ndarray, table: np.ndarray) -> np.ndarray:
+    """look each board up in the 3x3 perfect-play table"""
+    # Imported here, as it is only needed for this policy
+    from .helpers.perfect_play import HEADER, NO_MOVE, SOLVED
+
+    powers = 3 ** np.arange(boards.shape[1], dtype=np.int64)
+    entries = table[HEADER + boards.astype(np.int64) @ powers]
+    if not np.all(entries & SOLVED):
+        raise ValueError("Invalid table - a position is missing")
+    return (entries & NO_MOVE).astype(np.int64)
+
+
+def _load_table(size: int) -> np.ndarray:
+    """the perfect-play table as an array, for the table policy"""
+    from .helpers.perfect_play import load_table
+
+    table = load_table()
+    if table is None or table.size != size:
+        raise ValueError(
+            "The table policy needs the table for this board size - build "
+            "it with python -m game.helpers.perfect_play"
+        )
+    return np.frombuffer(table.data, dtype=np.uint8)
+
+
+def _play_batch(
+    games: int,
+    size: int,
+    policies: tuple[str, str],
+    rng: np.random.Generator,
+    table: Optional[np.ndarray],
+) -> tuple[np.ndarray, np.ndarray]:
+    """play one batch of games to the end
+
+    returns: the result of each game (1 or 2 for a win, -1 for a draw) and
+    the number of moves in each game
+    """
+    squares = size * size
+    boards = np.zeros((games, size, size), dtype=np.int8)
+    # A flat view of the same memory, with one column per square
+    flat = boards.reshape(games, squares)
+    results = np.zeros(games, dtype=np.int8)
+    lengths = np.zeros(games, dtype=np.int16)
+    playing = np.arange(games)
+
+    for move in range(squares):
+        player = move % 2 + 1
+        current = flat[playing]
+        policy = policies[player - 1]
+        if policy == "random":
+            chosen = _random_moves(current, rng)
+        elif policy == "greedy":
+            chosen = _greedy_moves(current, player, rng)
+        else:
+            chosen = _table_moves(current, table)
+        current[np.arange(len(playing)), chosen] = player
+        flat[playing] = current
+
+        # Check the games still being played for a win or a full board
+        won = (_line_counts(current, player) == size).any(axis=1)
+        results[playing[won]] = player
+        lengths[playing] = move + 1
+        if move == squares - 1:
+            results[playing[~won]] = -1
+        playing = playing[~won]
+        if not len(playing):
+            break
+
+    return results, lengths
+
+
+def simulate(
+    games: int,
+    size: int = 3,
+    policies: tuple[str, str] = ("random", "random"),
+    seed: Optional[int] = None,
+    batch_size: int = 100_000,
+) -> dict:
+    """play games between two players and summarise the results
+
+    games: the number of games to play
+    size: the number of rows and columns on the board
+    policies: how players 1 and 2 choose their moves, from POLICIES -
+    "table" plays perfectly from the precomputed 3x3 table
+    seed: the seed for the random choices, for repeatable results
+    batch_size: the number of games to hold in memory at once
+    returns: the number of games, the rate of wins for each player and of
+    draws, and a histogram of game lengths indexed by number of moves
+    """
+    for policy in policies:
+        if policy not in POLICIES:
+            raise ValueError(
+                "Invalid policy - must be one of " + ", ".join(POLICIES)
+            )
+    rng = np.random.default_rng(seed)
+    table = _load_table(size) if "table" in policies else None
+
+    totals = np.zeros(3, dtype=np.int64)
+    histogram = np.zeros(size * size + 1, dtype=np.int64)
+    for start in range(0, games, batch_size):
+        count = min(batch_size, games - start)
+        results, lengths = _play_batch(count, size, policies, rng, table)
+        # Draws are counted in slot 0
+        totals += np.bincount(np.maximum(results, 0), minlength=3)
+        histogram += np.bincount(lengths, minlength=size * size + 1)
+
+    return {
+        "games": games,
+        "player_1_wins": float(totals[1] / games) if games else 0.0,
+        "player_2_wins": float(totals[2] / games) if games else 0.0,
+        "draws": float(totals[0] / games) if games else 0.0,
+        "lengths": histogram.tolist(),
+    }
+
+
+def main():
+    """run a simulation from the command line and print the statistics"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--games", type=int, default=100_000)
+    parser.add_argument("--size", type=int, default=3)
+    parser.add_argument(
+        "--players", nargs=2, choices=POLICIES, default=["random", "random"]
+    )
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+    stats = simulate(args.games, args.size, tuple(args.players), args.seed)
+    print(json.dumps(stats))
+
+
+if __name__ == "__main__":
+    main()
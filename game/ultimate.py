@@ -0,0 +1,169 @@
+"""The rules of 2D (ultimate) tic-tac-toe, without any display
+
+The main board is a 3x3 grid of small 3x3 games. A move is made in one
+square of one small game, and the square chosen decides which small game
+the opponent must play in next: the game in the same position on the main
+board. If that game has already been won the opponent may play in any game
+still open. Winning a small game claims its square on the main board, and
+three claimed squares in a row win the whole game. A small game that ends
+in a draw is cleared and played again.
+
+Moves are numbered 0 to 80, as 9 * game + square, where both the game and
+the square are numbered 0 to 8 in row-major order.
+"""
+
+from typing import Optional
+
+from .helpers import win_masks
+
+__all__ = ["UltimateGame"]
+
+# Every square of a small game
+FULL = 0x1FF
+
+# Whether each 9-bit pattern of counters contains a line, so that a small
+# game or the main board can be checked with a single lookup
+WINS = tuple(
+    any(mask & line == line for line in win_masks(3)) for mask in range(512)
+)
+
+
+class UltimateGame:
+    """the state of a game, and the moves that can be made from it
+
+    small[player][game] is a 9-bit mask of player's counters in a small
+    game, macro[player] the mask of small games player has won, and forced
+    the small game the next move must be made in (-1 for any open game).
+    """
+
+    __slots__ = ("small", "macro", "forced", "player", "result", "history")
+
+    def __init__(self):
+        """start a new game, with player 1 to move anywhere"""
+        self.small = [None, [0] * 9, [0] * 9]
+        self.macro = [0, 0, 0]
+        self.forced = -1
+        self.player = 1
+        # 0 while in play, then the winner, or -1 for a draw
+        self.result = 0
+        # Everything needed to take each move back
+        self.history = []
+
+    def copy(self) -> "UltimateGame":
+        """an independent copy of the game, without its move history"""
+        game = UltimateGame.__new__(UltimateGame)
+        game.small = [None, list(self.small[1]), list(self.small[2])]
+        game.macro = list(self.macro)
+        game.forced = self.forced
+        game.player = self.player
+        game.result = self.result
+        game.history = []
+        return game
+
+    def cell(self, game: int, square: int) -> int:
+        """the player with a counter on a square of a small game, or 0"""
+        bit = 1 << square
+        if self.small[1][game] & bit:
+            return 1
+        if self.small[2][game] & bit:
+            return 2
+        return 0
+
+    def winner_of(self, game: int) -> int:
+        """the player who won a small game, or 0 if it is still open"""
+        bit = 1 << game
+        if self.macro[1] & bit:
+            return 1
+        if self.macro[2] & bit:
+            return 2
+        return 0
+
+    def open_games(self) -> int:
+        """the mask of small games that have not been won"""
+        return FULL & ~(self.macro[1] | self.macro[2])
+
+    def playable_games(self) -> int:
+        """the mask of small games the next move can be made in"""
+        if self.result:
+            return 0
+        if self.forced >= 0:
+            return 1 << self.forced
+        return self.open_games()
+
+    def empty_squares(self, game: int) -> int:
+        """the mask of empty squares in a small game"""
+        return FULL & ~(self.small[1][game] | self.small[2][game])
+
+    def is_legal(self, move: int) -> bool:
+        """whether a move can be made now"""
+        game, square = divmod(move, 9)
+        return bool(
+            self.playable_games() >> game & 1
+            and self.empty_squares(game) >> square & 1
+        )
+
+    def legal_moves(self) -> list[int]:
+        """every move that can be made now"""
+        moves = []
+        games = self.playable_games()
+        while games:
+            low = games & -games
+            game = low.bit_length() - 1
+            games ^= low
+            empty = self.empty_squares(game)
+            while empty:
+                bit = empty & -empty
+                moves.append(9 * game + bit.bit_length() - 1)
+                empty ^= bit
+        return moves
+
+    def make(self, move: int) -> int:
+        """play a move for the player whose turn it is
+
+        move: 9 * game + square
+        returns: the result of the game after the move - 0 while it is in
+        play, the winner, or -1 for a draw
+        """
+        game, square = divmod(move, 9)
+        player = self.player
+        mine = self.small[player]
+        theirs = self.small[3 - player]
+        # Enough to restore the position: the move, where play was forced,
+        # and the small game's counters if it gets cleared
+        cleared = None
+        mine[game] |= 1 << square
+        won = WINS[mine[game]]
+        if won:
+            self.macro[player] |= 1 << game
+            if WINS[self.macro[player]]:
+                self.result = player
+            elif not self.open_games():
+                self.result = -1
+        elif mine[game] | theirs[game] == FULL:
+            # A drawn small game is cleared and played again
+            cleared = (mine[game], theirs[game])
+            mine[game] = theirs[game] = 0
+        self.history.append((move, self.forced, cleared, won))
+
+        # The opponent plays in the game matching the square, if it is open
+        self.forced = square if self.open_games() >> square & 1 else -1
+        self.player = 3 - player
+        return self.result
+
+    def unmake(self):
+        """take back the last move"""
+        move, forced, cleared, won = self.history.pop()
+        game, square = divmod(move, 9)
+        player = 3 - self.player
+        self.player = player
+        self.forced = forced
+        self.result = 0
+        if cleared is not None:
+            self.small[player][game], self.small[3 - player][game] = cleared
+        if won:
+            self.macro[player] &= ~(1 << game)
+        self.small[player][game] &= ~(1 << square)
+
+    def last_move(self) -> Optional[int]:
+        """the move made most recently, or None at the start"""
+        return self.history[-1][0] if self.history else None
@@ -12,11 +12,12 @@ def menu():
         "1. Via the Command Line against a Bot\n"
         "2. Using a GUI against a Bot\n"
         "3. 2D Tic-Tac-Toe against a Human\n"
-        "4. Leave and never return\n"
+        "4. 2D Tic-Tac-Toe against a Bot\n"
+        "5. Leave and never return\n"
     )
     choice = ""
-    while choice not in ["1", "2", "3", "4"]:
-        choice = input("1, 2, 3 or 4: ")
+    while choice not in ["1", "2", "3", "4", "5"]:
+        choice = input("1, 2, 3, 4 or 5: ")
 
     if choice == "1":
         Game().game_loop()
@@ -24,6 +25,8 @@ def menu():
         TicTacToeWindow().mainloop()
     elif choice == "3":
         TicTacToeWindowIn2D().mainloop()
+    elif choice == "4":
+        TicTacToeWindowIn2D(bot=True).mainloop()
 
     print("\nGoodbye")
 
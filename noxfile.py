@@ -1,3 +1,5 @@
+import os
+
 import nox
 
 nox.options.sessions = ["lint"]
@@ -24,3 +26,40 @@ def format_(session):
     session.install("black", "isort")
     session.run("black", *PYTHON_SOURCES)
     session.run("isort", *PYTHON_SOURCES)
+
+
+@nox.session
+def tables(session):
+    """
+    Build the precomputed tables of solved positions used by the bot
+    """
+    session.run("python", "-m", "game.helpers.perfect_play")
+    session.install("numpy")
+    session.run("python", "-m", "game.helpers.retrograde")
+
+
+@nox.session
+def benchmark(session):
+    """
+    Time the game and the bot, and compare against the saved baseline
+    """
+    output = "benchmarks/results.json"
+    session.run("python", "-m", "benchmarks", "run", "--output", output)
+    if os.path.exists("benchmarks/baseline.json"):
+        session.run(
+            "python",
+            "-m",
+            "benchmarks",
+            "compare",
+            "benchmarks/baseline.json",
+            output,
+            *session.posargs,
+        )
+
+
+@nox.session
+def startup(session):
+    """
+    Check that importing the game stays fast and does not load the GUI
+    """
+    session.run("python", "-m", "benchmarks", "startup", *session.posargs)